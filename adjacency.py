@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import shapely
+import scipy.sparse as sp
+
+from geometry_store import load_regions, cache_folder, crs_key
+from logistic_model import growth_rate, pollution_trajectory, simulate_coupled, load_region_parameters, scenarios
+from result_store import open_store, append_results
+from checkpoint import atomic_write
+
+# -------------------------
+# SETTINGS
+# -------------------------
+params_path = "fitted_parameters.csv"
+out_folder = "Results"
+
+METRIC_CRS = "EPSG:2056"   # LV95: shared boundary lengths in metres
+TOLERANCE = 0.0            # metres; > 0 when neighbouring borders are not digitized identically
+
+END_YEAR = 2050
+DIFFUSION = 0.05           # NDVI exchanged with the neighbours per year
+POLLUTION_SPILL = 0.2      # share of a region's NO2 coming from its neighbours
+
+
+# -------------------------
+# ADJACENCY FROM SHARED BOUNDARY LENGTH
+# -------------------------
+def boundary_lengths(geoms, tolerance=TOLERANCE):
+    """
+    Sparse symmetric matrix of the boundary length shared by every pair of polygons.
+    An STRtree gives the candidate pairs, then the length of each boundary lying
+    on (or within `tolerance` of) the other polygon is measured in one vectorized call.
+    """
+    geoms = np.asarray(geoms)
+    tree = shapely.STRtree(geoms)
+    grown = shapely.buffer(geoms, tolerance) if tolerance else geoms
+    left, right = tree.query(grown, predicate="intersects")
+
+    keep = left != right
+    left, right = left[keep], right[keep]
+    shared = shapely.length(shapely.intersection(shapely.boundary(geoms[right]), grown[left]))
+    if tolerance:
+        # The buffer also catches `tolerance` of border past each end of the shared
+        # section (and 2 * tolerance around a corner-only contact)
+        shared = np.maximum(shared - 2 * tolerance, 0.0)
+
+    n = len(geoms)
+    L = sp.csr_matrix((shared, (left, right)), shape=(n, n))
+    L.eliminate_zeros()
+    # Both directions were measured: average them
+    return (L + L.T) * 0.5
+
+
+def district_adjacency(regions, name_col="NAME", tolerance=TOLERANCE):
+    """
+    Shared boundary length (m) between districts, one row/column per district name.
+    Districts split in several polygons are summed; borders inside a district are dropped.
+    Returns (names, L) with L a symmetric CSR matrix.
+    """
+    names, part_of = np.unique(regions[name_col].to_numpy(), return_inverse=True)
+    L = boundary_lengths(regions.geometry.to_numpy(), tolerance)
+
+    # Polygons -> districts: G^T L G with G the (polygons x districts) membership matrix
+    G = sp.csr_matrix((np.ones(len(part_of)), (np.arange(len(part_of)), part_of)),
+                      shape=(len(part_of), len(names)))
+    L = (G.T @ L @ G).tocsr()
+    L.setdiag(0)
+    L.eliminate_zeros()
+    return names, L
+
+
+def adjacency_path(tolerance=TOLERANCE):
+    return os.path.join(cache_folder, f"adjacency_{crs_key(METRIC_CRS)}_tol{tolerance:g}.npz")
+
+
+def load_adjacency(tolerance=TOLERANCE):
+    """District adjacency, computed from the shapefile once then read from data/cache/."""
+    path = adjacency_path(tolerance)
+    if os.path.exists(path):
+        with np.load(path, allow_pickle=False) as f:
+            L = sp.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+            return f["names"], L
+
+    names, L = district_adjacency(load_regions(crs=METRIC_CRS), tolerance=tolerance)
+    atomic_write(path, lambda tmp: np.savez(tmp, names=names.astype(str), data=L.data, indices=L.indices,
+                                            indptr=L.indptr, shape=np.array(L.shape)), suffix=".npz")
+    return names, L
+
+
+def row_normalize(L):
+    """Weights summing to 1 over the neighbours of each district (isolated ones keep a zero row)."""
+    total = np.asarray(L.sum(axis=1)).ravel()
+    scale = np.divide(1.0, total, out=np.zeros_like(total), where=total > 0)
+    return sp.diags(scale) @ L
+
+
+def align(names, L, regions):
+    """Adjacency restricted and reordered to `regions` (e.g. the index of the parameter table)."""
+    pos = pd.Index(names).get_indexer(regions)
+    if (pos < 0).any():
+        missing = np.asarray(regions)[pos < 0]
+        raise KeyError(f"Regions without geometry: {list(missing)[:5]}")
+    return L[pos][:, pos].tocsr()
+
+
+# -------------------------
+# COUPLED SCENARIOS
+# -------------------------
+def coupled_scenarios(params, W, end_year=END_YEAR, rates=scenarios,
+                      diffusion=DIFFUSION, spill=POLLUTION_SPILL):
+    """
+    NDVI of every region under every scenario, all simulated together.
+    W: row-normalized adjacency aligned on params.index.
+    Pollution is mixed with the neighbours' once per year, NDVI at every sub-step;
+    districts without neighbours in W (e.g. dropped by align) stay uncoupled.
+    Returns one long DataFrame per scenario (Region, Year, B_predicted).
+    """
+    first_year = int(params["last_year"].max()) + 1
+    years = np.arange(first_year, end_year + 1)
+    names = list(rates)
+
+    # (regions, scenarios, years)
+    P = pollution_trajectory(params["last_NO2"].to_numpy()[:, None], [rates[s] for s in names], len(years))
+    n, S, T = P.shape
+    # Only districts with neighbours import pollution; isolated ones keep their own
+    share = spill * (np.asarray(W.sum(axis=1)).ravel() > 0)[:, None, None]
+    P = (1.0 - share) * P + share * (W @ P.reshape(n, -1)).reshape(n, S, T)
+
+    r = growth_rate(params["r0_global"].to_numpy()[:, None, None],
+                    params["alpha_global"].to_numpy()[:, None, None], P)
+    K = params["K_estimated"].to_numpy()[:, None]
+    B0 = params["B0_estimated"].to_numpy()[:, None]
+    B = simulate_coupled(B0, K, r, W, diffusion)
+
+    out = {}
+    for k, name in enumerate(names):
+        out[name] = pd.DataFrame({
+            "Region": np.repeat(params.index.to_numpy(), T),
+            "Year": np.tile(years, n),
+            "B_predicted": B[:, k, :].ravel(),
+        })
+    return out
+
+
+if __name__ == "__main__":
+    diffusion = float(sys.argv[1]) if len(sys.argv) > 1 else DIFFUSION
+
+    start = time.perf_counter()
+    names, L = load_adjacency()
+    print(f"Adjacency: {len(names)} districts, {L.nnz // 2} shared borders "
+          f"({time.perf_counter() - start:.2f} s)")
+
+    params = load_region_parameters(params_path)
+    W = row_normalize(align(names, L, params.index))
+
+    start = time.perf_counter()
+    results = coupled_scenarios(params, W, diffusion=diffusion)
+    print(f"Coupled simulation in {time.perf_counter() - start:.2f} s")
+
+    os.makedirs(out_folder, exist_ok=True)
+    conn = open_store()
+    for name, df in results.items():
+        path = os.path.join(out_folder, f"NDVI_coupled_{name}.csv")
+        df.to_csv(path, index=False, float_format="%.6f")
+        append_results(conn, f"coupled_{name}", df)
+        print(f"saved {path} (scenario 'coupled_{name}' in the result store)")
+    conn.close()
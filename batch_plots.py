@@ -0,0 +1,123 @@
+import os
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+import matplotlib
+matplotlib.use("Agg")  # headless: no window, no plt.show()
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from result_store import store_path, open_store, open_fresh_store, read_region, list_regions
+
+# -------------------------
+# SETTINGS
+# -------------------------
+out_folder = "Results"
+params_path = "fitted_parameters.csv"
+
+scenario_labels = {
+    "constant": "NO₂ Constant",
+    "minus1percent": "NO₂ -1% per year",
+    "plus1percent": "NO₂ +1% per year",
+}
+
+# -------------------------
+# WORKER STATE (one figure and one store connection per process)
+# -------------------------
+_fig = None
+_ax = None
+_lines = {}
+_conn = None
+
+
+def _init_worker(path):
+    """Build the figure once; each region only swaps the line data and the title."""
+    global _fig, _ax, _lines, _conn
+    _fig, _ax = plt.subplots(figsize=(10, 6))
+    _lines = {
+        scenario: _ax.plot([], [], label=label, linewidth=2)[0]
+        for scenario, label in scenario_labels.items()
+    }
+    _ax.set_xlabel("Year", fontsize=14)
+    _ax.set_ylabel("Predicted NDVI", fontsize=14)
+    _ax.set_title(" ", fontsize=16)
+    _ax.grid(True, linestyle="--", alpha=0.6)
+    _ax.legend(fontsize=12)
+    _fig.tight_layout()
+    _conn = open_store(path)
+
+
+def region_filename(region):
+    """Safe PNG name for a district (names contain spaces, slashes, accents)."""
+    slug = re.sub(r"[^\w\-]+", "_", region).strip("_")
+    return os.path.join(out_folder, f"NDVI_{slug}.png")
+
+
+def plot_region(region):
+    """Render the scenario plot of one region, reusing the worker's figure."""
+    df = read_region(_conn, region)
+
+    for scenario, line in _lines.items():
+        sub = df[df["scenario"] == scenario]
+        line.set_data(sub["Year"].values, sub["B_predicted"].values)
+
+    _ax.relim()
+    _ax.autoscale_view()
+    _ax.set_title(f"Future NDVI Predictions for {region}", fontsize=16)
+
+    path = region_filename(region)
+    _fig.savefig(path)
+    return path
+
+
+def plot_sensitivity(path=params_path):
+    """Headless version of the log(r) vs NO2 scatter of visualization_1.py."""
+    df = pd.read_csv(path)
+    clean = df[df["r_estimated"] > 0].copy()
+    P = clean["Mean_NO2"].values
+    log_r = np.log(clean["r_estimated"].values)
+
+    slope, intercept = np.polyfit(P, log_r, 1)
+    alpha = -slope
+    P_line = np.linspace(min(P), max(P), 200)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter(P, log_r, alpha=0.6, label="Observed log(r)", color="blue")
+    ax.plot(P_line, slope * P_line + intercept, label=f"Fitted Line  (α={alpha:.3f})", linewidth=2, color="red")
+    ax.set_xlabel("Mean NO₂", fontsize=14)
+    ax.set_ylabel("log(r)", fontsize=14)
+    ax.set_title("NDVI Sensitivity to NO₂\nlog(r) vs NO₂", fontsize=16)
+    ax.grid(True, linestyle="--", alpha=0.5)
+    ax.legend(fontsize=12)
+    fig.tight_layout()
+
+    out = os.path.join(out_folder, "Sensitivity_plot.png")
+    fig.savefig(out)
+    plt.close(fig)
+    return out
+
+
+def render_all(processes=None, path=store_path):
+    """Render every region of the store across a process pool."""
+    # Re-simulated scenarios (CSVs newer than the store) are re-imported first
+    conn = open_fresh_store(path)
+    regions = list_regions(conn)
+    conn.close()
+
+    os.makedirs(out_folder, exist_ok=True)
+    with Pool(processes=processes, initializer=_init_worker, initargs=(path,)) as pool:
+        return list(pool.imap_unordered(plot_region, regions, chunksize=4))
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    start = time.perf_counter()
+    written = render_all(processes)
+    print(f"{len(written)} region plots written to {out_folder}/ in {time.perf_counter() - start:.1f} s")
+
+    if os.path.exists(params_path):
+        print(f"Sensitivity plot: {plot_sensitivity()}")
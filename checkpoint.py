@@ -0,0 +1,88 @@
+import os
+import re
+import shutil
+import pandas as pd
+
+# -------------------------
+# SETTINGS
+# -------------------------
+checkpoint_folder = os.path.join("Results", "checkpoints")
+
+
+# -------------------------
+# ATOMIC FILE WRITES
+# -------------------------
+def atomic_write(path, write, suffix=""):
+    """
+    Produce `path` through write(tmp_path), flush it to disk, then rename it over
+    `path`: readers see the old file or the new one, never a truncated one.
+    `suffix` keeps the extension some writers insist on (np.save adds .npy otherwise).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp" + suffix
+    write(tmp)
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# -------------------------
+# CHUNK-LEVEL CHECKPOINTS
+# -------------------------
+class Checkpoint:
+    """
+    Completed work units of one job, one CSV per unit.
+    A unit is committed by writing a temporary file, flushing it to disk and
+    renaming it: a killed job leaves either the whole unit or nothing, never
+    a truncated file, so a resumed job only redoes the units in flight.
+    """
+
+    def __init__(self, job, resume=False, folder=checkpoint_folder):
+        self.path = os.path.join(folder, job)
+        if not resume and os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path, exist_ok=True)
+
+        # Leftovers of units that were being written when the job died
+        for name in os.listdir(self.path):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.path, name))
+
+    def _file(self, unit):
+        return os.path.join(self.path, re.sub(r"[^\w\-.]+", "_", str(unit)) + ".csv")
+
+    def done(self, unit):
+        return os.path.exists(self._file(unit))
+
+    def commit(self, unit, df):
+        atomic_write(self._file(unit), lambda tmp: df.to_csv(tmp, index=False))
+
+    def load(self, unit):
+        try:
+            return pd.read_csv(self._file(unit))
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
+
+    def gather(self, units):
+        """Concatenate the results of `units`, in that order."""
+        return pd.concat([self.load(u) for u in units], ignore_index=True)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def run_units(checkpoint, units, func):
+    """
+    Run func(*args) for every (unit, args) pair not yet committed, committing
+    each DataFrame result as soon as it is produced. Returns all results.
+    """
+    units = list(units)
+    n_done = 0
+    for unit, args in units:
+        if checkpoint.done(unit):
+            n_done += 1
+            continue
+        checkpoint.commit(unit, func(*args))
+    if n_done:
+        print(f"Resumed: {n_done}/{len(units)} units already completed")
+    return checkpoint.gather([unit for unit, _ in units])
@@ -0,0 +1,153 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# SETTINGS
+# -------------------------
+# CMT_COMPACT=1 switches the pipeline scripts to the compact representation
+COMPACT = os.environ.get("CMT_COMPACT", "0") == "1"
+
+dictionary_path = "region_dictionary.csv"
+YEAR_DTYPE = "int16"
+FLOAT_DTYPE = "float32"
+
+
+# -------------------------
+# REGION DICTIONARY (shared by every table)
+# -------------------------
+def region_dtype(names=None, path=dictionary_path):
+    """
+    Categorical dtype with one fixed list of regions, so the integer codes mean
+    the same thing in every DataFrame. Created (sorted) from `names` on first use;
+    regions seen later are appended at the end, so existing codes never change and
+    older frames can be brought to the new dtype with .astype(region_dtype()).
+    """
+    if os.path.exists(path):
+        categories = pd.read_csv(path)["Region"].tolist()
+        if names is not None:
+            missing = set(pd.unique(pd.Series(names).dropna())) - set(categories)
+            if missing:
+                categories = categories + sorted(missing)
+                pd.DataFrame({"Region": categories}).to_csv(path, index_label="Code")
+    elif names is not None:
+        categories = sorted(pd.unique(pd.Series(names).dropna()))
+        pd.DataFrame({"Region": categories}).to_csv(path, index_label="Code")
+    else:
+        raise FileNotFoundError(f"{path} not found and no region names given")
+    return pd.CategoricalDtype(categories=categories)
+
+
+# -------------------------
+# TABLES
+# -------------------------
+def compact_frame(df, floats=True):
+    """Region -> shared categorical, Year -> int16, float64 -> float32."""
+    out = df.copy()
+    if "Region" in out.columns:
+        out["Region"] = out["Region"].astype(region_dtype(out["Region"]))
+    if "Year" in out.columns:
+        out["Year"] = out["Year"].astype(YEAR_DTYPE)
+    if floats:
+        for c in out.columns:
+            if out[c].dtype == np.float64:
+                out[c] = out[c].astype(FLOAT_DTYPE)
+    return out
+
+
+def read_csv_compact(path, floats=True, **kwargs):
+    """pd.read_csv parsing straight into the compact dtypes (no float64/object intermediate)."""
+    columns = pd.read_csv(path, nrows=0, **kwargs).columns
+    dtype = {}
+    if "Region" in columns:
+        names = pd.read_csv(path, usecols=["Region"], **kwargs)["Region"]
+        dtype["Region"] = region_dtype(names)
+    if "Year" in columns:
+        dtype["Year"] = YEAR_DTYPE
+    df = pd.read_csv(path, dtype=dtype, **kwargs)
+    if floats:
+        for c in df.columns:
+            if df[c].dtype == np.float64:
+                df[c] = df[c].astype(FLOAT_DTYPE)
+    return df
+
+
+# -------------------------
+# RASTERS
+# -------------------------
+def read_band_masked(src, band=1, window=None):
+    """Band in its native dtype (float32 stays float32), nodata masked, no NaN-filled copy."""
+    return src.read(band, window=window, masked=True)
+
+
+def masked_mean(arr):
+    """Mean of the valid cells, accumulated in float64 without upcasting the array."""
+    if np.ma.count(arr) == 0:
+        return np.nan
+    return float(arr.mean(dtype=np.float64))
+
+
+# -------------------------
+# MEMORY BENCHMARK
+# -------------------------
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def synthetic_table(n_regions=2000, n_years=100, n_values=4, seed=0):
+    """Scaled-up Region/Year table with the layout of NDVI_NO2_timeseries.csv."""
+    rng = np.random.default_rng(seed)
+    regions = np.array([f"Commune {i:04d}" for i in range(n_regions)], dtype=object)
+    df = pd.DataFrame({
+        "Region": np.repeat(regions, n_years),
+        "Year": np.tile(np.arange(2010, 2010 + n_years), n_regions),
+    })
+    for k in range(n_values):
+        df[f"Value_{k}"] = rng.random(len(df))
+    return df
+
+
+def benchmark(paths, raster_paths=(), scale=(2000, 100)):
+    rows = []
+
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        before = frame_bytes(pd.read_csv(path))
+        after = frame_bytes(read_csv_compact(path))
+        rows.append({"Data": path, "Default_MB": before / 1e6, "Compact_MB": after / 1e6})
+
+    n_regions, n_years = scale
+    synth = synthetic_table(n_regions, n_years)
+    compact_synth = synth.assign(Region=synth["Region"].astype(pd.CategoricalDtype(sorted(synth["Region"].unique()))))
+    compact_synth = compact_synth.astype({"Year": YEAR_DTYPE, **{c: FLOAT_DTYPE for c in synth.columns if c.startswith("Value_")}})
+    rows.append({
+        "Data": f"synthetic {n_regions} regions x {n_years} years",
+        "Default_MB": frame_bytes(synth) / 1e6,
+        "Compact_MB": frame_bytes(compact_synth) / 1e6,
+    })
+
+    if raster_paths:
+        import rasterio
+        for path in raster_paths:
+            with rasterio.open(path) as src:
+                before = src.read(1).astype(float).nbytes
+                arr = read_band_masked(src)
+                after = arr.data.nbytes + np.ma.getmaskarray(arr).nbytes
+            rows.append({"Data": path, "Default_MB": before / 1e6, "Compact_MB": after / 1e6})
+
+    result = pd.DataFrame(rows)
+    result["Reduction"] = 1 - result["Compact_MB"] / result["Default_MB"]
+    return result
+
+
+if __name__ == "__main__":
+    import glob
+    csvs = sys.argv[1:] or [
+        "NDVI_NO2_timeseries.csv",
+        "fitted_parameters.csv",
+        os.path.join("Results", "NDVI_scenario_constant.csv"),
+    ]
+    rasters = sorted(glob.glob(os.path.join("data", "*.tif")))[:3]
+    print(benchmark(csvs, rasters).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
@@ -0,0 +1,185 @@
+import os
+import sys
+import hashlib
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import curve_fit, OptimizeWarning
+
+from logistic_model import logistic
+from checkpoint import atomic_write
+
+# -------------------------
+# SETTINGS
+# -------------------------
+input_path = "NDVI_NO2_timeseries.csv"
+cache_folder = os.path.join("Results", "cv_cache")
+out_path = os.path.join("Results", "cv_scores.csv")
+REGIONS_PER_TASK = 16
+
+# Same bounded fit as main.py
+P0_R = 0.1
+BOUNDS = ([0.0001, 0.1, 0.0], [2.0, 2.0, 2.0])
+MAXFEV = 8000
+
+
+# -------------------------
+# FITS
+# -------------------------
+def fit_region(t, B):
+    """Logistic (r, K, B0) of one region, as in main.py. None if the fit fails."""
+    if len(B) < 4:
+        return None
+    try:
+        popt, _ = curve_fit(
+            logistic, t, B,
+            p0=[P0_R, max(B) + 0.1, B[0]],
+            bounds=BOUNDS,
+            maxfev=MAXFEV,
+        )
+    except Exception:
+        return None
+    return popt
+
+
+def _fit_chunk(args):
+    """Worker task: logistic fits of a chunk of regions for one held-out year."""
+    held_out, t0, chunk = args
+    warnings.filterwarnings("ignore", category=OptimizeWarning)
+
+    rows = []
+    for region, years, B in chunk:
+        keep = years != held_out
+        popt = fit_region(years[keep] - t0, B[keep])
+        if popt is None:
+            continue
+        rows.append({"Region": region, "r_estimated": popt[0], "K_estimated": popt[1], "B0_estimated": popt[2]})
+    return rows
+
+
+def fold_predictions(df, held_out, fits, t0):
+    """Refit alpha on the training years and predict the held-out year of every region."""
+    train = df[df["Year"] != held_out].merge(fits, on="Region")
+    train = train[train["r_estimated"] > 0]
+
+    # log(r) = log(r0) - alpha P, on the per-year rows as in main.py
+    coef = np.polyfit(train["Mean_NO2"].values, np.log(train["r_estimated"].values), 1)
+    alpha = -coef[0]
+    r0 = np.exp(coef[1])
+
+    P_mean = train.groupby("Region")["Mean_NO2"].mean().rename("P_train_mean")
+    test = df[df["Year"] == held_out].merge(fits, on="Region").merge(P_mean, on="Region")
+
+    t = test["Year"].values - t0
+    r_P = r0 * np.exp(-alpha * test["P_train_mean"].values)
+
+    test = test.assign(
+        held_out=held_out,
+        r0_global=r0,
+        alpha_global=alpha,
+        pred_logistic=logistic(t, test["r_estimated"].values, test["K_estimated"].values, test["B0_estimated"].values),
+        pred_pollution=logistic(t, r_P, test["K_estimated"].values, test["B0_estimated"].values),
+    )
+    return test
+
+
+# -------------------------
+# CROSS-VALIDATION
+# -------------------------
+def data_key(df):
+    """Hash of the input table: cached folds are reused only for identical data and settings."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    h.update(repr((BOUNDS, P0_R, MAXFEV)).encode())
+    return h.hexdigest()[:16]
+
+
+def leave_one_year_out(df, workers=None, cache=cache_folder):
+    """
+    Held-out NDVI predictions for every year, refitting the regional logistic
+    models and alpha on the remaining years. Region fits of all folds run in
+    parallel; each fold is cached on disk so later scoring does not refit.
+    """
+    df = df.dropna(subset=["Mean_NDVI", "Mean_NO2"]).sort_values(["Region", "Year"]).reset_index(drop=True)
+    t0 = int(df["Year"].min())
+    years = np.sort(df["Year"].unique())
+
+    fold_dir = os.path.join(cache, data_key(df))
+    os.makedirs(fold_dir, exist_ok=True)
+    fold_path = {y: os.path.join(fold_dir, f"fold_{y}.csv") for y in years}
+    todo = [y for y in years if not os.path.exists(fold_path[y])]
+
+    if todo:
+        series = [
+            (region, g["Year"].values, g["Mean_NDVI"].values)
+            for region, g in df.groupby("Region", sort=True)
+        ]
+        chunks = [series[i:i + REGIONS_PER_TASK] for i in range(0, len(series), REGIONS_PER_TASK)]
+        tasks = [(y, t0, chunk) for y in todo for chunk in chunks]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_chunk, tasks))
+
+        per_fold = {y: [] for y in todo}
+        for (y, _, _), rows in zip(tasks, results):
+            per_fold[y].extend(rows)
+
+        for y in todo:
+            fits = pd.DataFrame(per_fold[y], columns=["Region", "r_estimated", "K_estimated", "B0_estimated"])
+            pred = fold_predictions(df, y, fits, t0)
+            # Write then rename: an interrupted run never leaves a truncated fold
+            atomic_write(fold_path[y], lambda tmp: pred.to_csv(tmp, index=False))
+
+    return pd.concat([pd.read_csv(fold_path[y]) for y in years], ignore_index=True)
+
+
+# -------------------------
+# SCORING
+# -------------------------
+def rmse(obs, pred):
+    return float(np.sqrt(np.mean((pred - obs) ** 2)))
+
+
+def mae(obs, pred):
+    return float(np.mean(np.abs(pred - obs)))
+
+
+def bias(obs, pred):
+    return float(np.mean(pred - obs))
+
+
+def r2(obs, pred):
+    return float(1 - np.sum((obs - pred) ** 2) / np.sum((obs - obs.mean()) ** 2))
+
+
+SCORES = {"rmse": rmse, "mae": mae, "bias": bias, "r2": r2}
+
+
+def score(predictions, scores=SCORES, by=None):
+    """Score both predictors on the cached held-out predictions, overall or grouped (e.g. by='held_out')."""
+    groups = [("all", predictions)] if by is None else predictions.groupby(by)
+
+    rows = []
+    for key, g in groups:
+        for model in ("logistic", "pollution"):
+            row = {"group": key, "model": model, "n": len(g)}
+            for name, fn in scores.items():
+                row[name] = fn(g["Mean_NDVI"].values, g[f"pred_{model}"].values)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else input_path
+    df = pd.read_csv(path)
+
+    predictions = leave_one_year_out(df)
+
+    overall = score(predictions)
+    per_year = score(predictions, by="held_out")
+    pd.concat([overall, per_year], ignore_index=True).to_csv(out_path, index=False)
+
+    print("Leave-one-year-out skill (held-out NDVI):")
+    print(overall.to_string(index=False))
+    print(f"\nsaved {out_path}")
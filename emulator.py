@@ -0,0 +1,237 @@
+import os
+import time
+import math
+import numpy as np
+
+from logistic_model import (
+    STEPS_PER_YEAR, growth_rate, pollution_trajectory, simulate_logistic, load_region_parameters,
+)
+from checkpoint import atomic_write
+
+# -------------------------
+# SETTINGS
+# -------------------------
+params_path = "fitted_parameters.csv"
+table_path = os.path.join("Results", "ndvi_emulator.npz")
+
+H_MAX = 100                   # horizons 1 .. H_MAX years after the last observation
+S_RANGE = (-4.0, 4.0)         # s = alpha * P_last
+S_STEP = 0.025
+RATE_RANGE = (-0.05, 0.05)    # annual pollution change rate
+RATE_STEP = 0.001
+FLOAT32_EPS = 1e-7            # rounding of the stored table (log scale)
+CURVATURE_MARGIN = 2.0        # curvature may vary between the nodes of a cell
+
+
+# -------------------------
+# REDUCTION OF THE INPUTS
+# -------------------------
+# With the exact yearly step and P_i = P_last * (1 + g)^i,
+#     B_h = K / (1 + (K/B0 - 1) * exp(-R_h)),
+#     R_h = sum_{i=1..h} r0 * exp(-alpha * P_i) = r0 * S_h(s, g),   s = alpha * P_last.
+# K, B0 and r0 enter in closed form; only log S_h(s, g) needs to be tabulated:
+# a 3-D array over (horizon, s, g), interpolated bilinearly in (s, g).
+#
+# The service and ndvi_sim.c use N explicit Euler sub-steps per year instead of the exact
+# step. With x = B/K in (0, 1) and u = log(x / (1 - x)), the exact flow moves u by r*dt
+# per sub-step; one Euler sub-step moves it by log(1 + a(1-x)) - log(1 - a x), a = r*dt,
+# which differs from a by at most a^2 / (2 (1 - |a|)^2) (Taylor, |a| <= 1/2). The gaps add
+# up without amplification, so the Euler B_h is the closed form at R_h + d with
+#     |d| <= sum_i r_i^2 / (2 N (1 - |r|max/N)^2) <= |r|max * sum_i |r_i| / (2 N (1 - |r|max/N)^2),
+# and |r|max is r_1 or r_h since r_i is monotone in i.
+
+
+def exact_log_S(s, g, h_max=H_MAX):
+    """log S_h for h = 1 .. h_max on the last axis, vectorized over s and g."""
+    s = np.asarray(s, dtype=float)
+    g = np.asarray(g, dtype=float)
+    growth = pollution_trajectory(1.0, g, h_max)                 # (1 + g)^i
+    terms = growth_rate(1.0, s[..., None], growth)               # exp(-s (1 + g)^i)
+    return np.log(np.cumsum(terms, axis=-1))
+
+
+def closed_form(K, B0, R):
+    return K / (1.0 + (K / B0 - 1.0) * np.exp(-R))
+
+
+def euler_gap(r0, s, g, h, S_upper, steps_per_year=STEPS_PER_YEAR):
+    """
+    Bound on the shift of R_h between the exact yearly step and `steps_per_year`
+    Euler sub-steps (see above), given an upper bound S_upper on S_h.
+    Infinite where it does not apply (|r| dt > 1/2).
+    """
+    r0 = np.abs(np.asarray(r0, dtype=float))
+    r_max = r0 * np.maximum(np.exp(-s * (1.0 + g)), np.exp(-s * (1.0 + g) ** h))
+    a_max = r_max / steps_per_year
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap = r_max * r0 * S_upper / (2.0 * steps_per_year * (1.0 - a_max) ** 2)
+    return np.where(a_max <= 0.5, gap, np.inf)
+
+
+def corner_max(a):
+    """Per cell, the largest of the values at its four corner nodes (last two axes)."""
+    return np.maximum.reduce([a[..., :-1, :-1], a[..., 1:, :-1], a[..., :-1, 1:], a[..., 1:, 1:]])
+
+
+# -------------------------
+# BUILD
+# -------------------------
+def build(h_max=H_MAX, s_range=S_RANGE, s_step=S_STEP, rate_range=RATE_RANGE, rate_step=RATE_STEP,
+          path=table_path):
+    """
+    Tabulate log S over the grid, with for each cell and horizon a bound eps on
+    |log S - interpolated log S| from the local curvature (stored as float16, rounded up).
+    """
+    s_axis = np.arange(s_range[0], s_range[1] + s_step / 2, s_step)
+    g_axis = np.arange(rate_range[0], rate_range[1] + rate_step / 2, rate_step)
+    table = exact_log_S(s_axis[:, None], g_axis[None, :], h_max)     # (ns, ng, H)
+    table = np.ascontiguousarray(np.moveaxis(table, -1, 0)).astype(np.float32)
+
+    # Bilinear error <= (|d2f/ds2| ds^2 + |d2f/dg2| dg^2) / 8 inside a cell; the second
+    # derivatives are taken from the second differences at the cell's four corners
+    t = table.astype(float)
+    d2s = np.abs(np.diff(t, 2, axis=1))
+    d2g = np.abs(np.diff(t, 2, axis=2))
+    d2s = np.concatenate([d2s[:, :1], d2s, d2s[:, -1:]], axis=1)
+    d2g = np.concatenate([d2g[:, :, :1], d2g, d2g[:, :, -1:]], axis=2)
+    eps = (corner_max(d2s) + corner_max(d2g)) / 8.0 * CURVATURE_MARGIN
+    eps += FLOAT32_EPS * (1.0 + corner_max(np.abs(t)))
+    eps16 = eps.astype(np.float16)
+    eps = np.where(eps16 < eps, np.nextafter(eps16, np.float16(np.inf)), eps16)
+
+    atomic_write(path, lambda tmp: np.savez(tmp, table=table, eps=eps,
+                                            s_axis=np.array([s_axis[0], s_step, len(s_axis)]),
+                                            g_axis=np.array([g_axis[0], rate_step, len(g_axis)])),
+                 suffix=".npz")
+    return Emulator(path)
+
+
+# -------------------------
+# QUERIES
+# -------------------------
+class Emulator:
+    """Future NDVI from the tabulated log S: one bilinear lookup plus the closed form."""
+
+    def __init__(self, path=table_path):
+        with np.load(path, allow_pickle=False) as f:
+            self.table = f["table"]
+            self.eps = f["eps"]
+            s0, ds, ns = f["s_axis"]
+            g0, dg, ng = f["g_axis"]
+        self.s0, self.ds, self.ns = float(s0), float(ds), int(ns)
+        self.g0, self.dg, self.ng = float(g0), float(dg), int(ng)
+        self.h_max = self.table.shape[0]
+
+    def log_S(self, s, g, h):
+        """Interpolated log S_h; NaN outside the table."""
+        s, g, h = np.broadcast_arrays(np.asarray(s, float), np.asarray(g, float), np.asarray(h))
+        x = (s - self.s0) / self.ds
+        y = (g - self.g0) / self.dg
+        inside = (x >= 0) & (x <= self.ns - 1) & (y >= 0) & (y <= self.ng - 1) & (h >= 1) & (h <= self.h_max)
+
+        i = np.clip(np.floor(x), 0, self.ns - 2).astype(np.intp)
+        j = np.clip(np.floor(y), 0, self.ng - 2).astype(np.intp)
+        k = np.clip(h, 1, self.h_max).astype(np.intp) - 1
+        fx, fy = x - i, y - j
+        T = self.table
+        out = ((1 - fx) * (1 - fy) * T[k, i, j] + fx * (1 - fy) * T[k, i + 1, j]
+               + (1 - fx) * fy * T[k, i, j + 1] + fx * fy * T[k, i + 1, j + 1])
+        return np.where(inside, out, np.nan)
+
+    def cell_eps(self, s, g, h):
+        """Interpolation error bound of the table cell holding each query."""
+        i = np.clip(np.floor((np.asarray(s, float) - self.s0) / self.ds), 0, self.ns - 2).astype(np.intp)
+        j = np.clip(np.floor((np.asarray(g, float) - self.g0) / self.dg), 0, self.ng - 2).astype(np.intp)
+        k = np.clip(h, 1, self.h_max).astype(np.intp) - 1
+        return self.eps[k, i, j].astype(float)
+
+    def ndvi(self, r0, alpha, K, B0, P_last, rate, horizon, steps_per_year=STEPS_PER_YEAR):
+        """
+        NDVI `horizon` years after the last observation (vectorized) with the exact
+        yearly step, and a bound on its difference to the simulation with
+        `steps_per_year` Euler sub-steps (simulate_logistic's default, as the service
+        and ndvi_sim.c), or to the exact simulation with steps_per_year=None.
+        The Euler part of the bound assumes 0 < B0 < K. Out-of-table queries give NaN.
+        """
+        K = np.asarray(K, dtype=float)
+        h = np.asarray(horizon)
+        s = np.multiply(alpha, P_last)
+        log_S = self.log_S(s, rate, h)
+        R = np.asarray(r0, dtype=float) * np.exp(log_S)
+        B = closed_form(K, B0, R)
+
+        # B is monotone in R: the bound is reached at one end of [R_low, R_high]
+        eps = self.cell_eps(s, rate, h)
+        R_low = np.minimum(R * np.exp(eps), R * np.exp(-eps))
+        R_high = np.maximum(R * np.exp(eps), R * np.exp(-eps))
+        if steps_per_year is not None:
+            gap = euler_gap(r0, s, rate, h, np.exp(log_S + eps), steps_per_year)
+            R_low, R_high = R_low - gap, R_high + gap
+        with np.errstate(over="ignore", invalid="ignore"):
+            error = np.maximum(np.abs(closed_form(K, B0, R_high) - B),
+                               np.abs(closed_form(K, B0, R_low) - B))
+        return B, error
+
+    def ndvi_one(self, r0, alpha, K, B0, P_last, rate, horizon):
+        """Scalar version of ndvi() in plain Python (no array overhead), NDVI only."""
+        x = (alpha * P_last - self.s0) / self.ds
+        y = (rate - self.g0) / self.dg
+        if not (0 <= x <= self.ns - 1 and 0 <= y <= self.ng - 1 and 1 <= horizon <= self.h_max):
+            return math.nan
+        i = min(int(x), self.ns - 2)
+        j = min(int(y), self.ng - 2)
+        fx, fy = x - i, y - j
+        T = self.table[horizon - 1]
+        a, b = T[i, j:j + 2].tolist()
+        c, d = T[i + 1, j:j + 2].tolist()
+        log_S = (1 - fx) * ((1 - fy) * a + fy * b) + fx * ((1 - fy) * c + fy * d)
+        return K / (1.0 + (K / B0 - 1.0) * math.exp(-r0 * math.exp(log_S)))
+
+
+def load_emulator(path=table_path):
+    """The stored emulator, built on first use."""
+    return Emulator(path) if os.path.exists(path) else build(path=path)
+
+
+# -------------------------
+# VALIDATION
+# -------------------------
+def validate(emulator, params, n=20000, seed=0):
+    """Random (region, rate, horizon) queries against the exact and the Euler simulations."""
+    rng = np.random.default_rng(seed)
+    p = params.iloc[rng.integers(len(params), size=n)]
+    rate = rng.uniform(*RATE_RANGE, n)
+    h = rng.integers(1, emulator.h_max + 1, n)
+    cols = [p[c].to_numpy(dtype=float) for c in ("r0_global", "alpha_global", "K_estimated", "B0_estimated", "last_NO2")]
+    r0, alpha, K, B0, P_last = cols
+
+    r = growth_rate(r0[:, None], alpha[:, None], pollution_trajectory(P_last, rate, emulator.h_max))
+    out = {"queries": n}
+    for name, steps in (("exact", None), ("euler", STEPS_PER_YEAR)):
+        B, bound = emulator.ndvi(r0, alpha, K, B0, P_last, rate, h, steps_per_year=steps)
+        error = np.abs(B - simulate_logistic(B0, K, r, steps_per_year=steps)[np.arange(n), h - 1])
+        out["outside_table"] = int(np.isnan(B).sum())
+        out[f"max_error_{name}"] = float(np.nanmax(error))
+        out[f"max_bound_{name}"] = float(np.nanmax(bound))
+        out[f"bound_respected_{name}"] = bool(np.all((error <= bound + 1e-12) | np.isnan(B)))
+    return out
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    emulator = build()
+    print(f"Table {emulator.table.shape} ({emulator.table.nbytes / 1e6:.1f} MB) built in "
+          f"{time.perf_counter() - start:.2f} s, saved {table_path}")
+    print(f"log S interpolation error: median {np.median(emulator.eps):.1e}, worst {emulator.eps.max():.1e}")
+
+    if os.path.exists(params_path):
+        params = load_region_parameters(params_path)
+        print(validate(emulator, params))
+
+        p = params.iloc[0]
+        args = (p["r0_global"], p["alpha_global"], p["K_estimated"], p["B0_estimated"], p["last_NO2"], -0.01, 30)
+        n = 100000
+        start = time.perf_counter()
+        for _ in range(n):
+            emulator.ndvi_one(*args)
+        print(f"{(time.perf_counter() - start) / n * 1e6:.2f} us per scalar query")
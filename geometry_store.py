@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import hashlib
+import geopandas as gpd
+from pyproj import CRS
+
+from checkpoint import atomic_write
+
+# -------------------------
+# FILE SETTINGS
+# -------------------------
+shp_name = "swissBOUNDARIES3D_1_5_TLM_BEZIRKSGEBIET.shp"
+# data/ first; main.py used to read the shapefile from the working directory
+shp_path = os.path.join("data", shp_name)
+if not os.path.exists(shp_path) and os.path.exists(shp_name):
+    shp_path = shp_name
+cache_folder = os.path.join("data", "cache")
+
+# Already loaded layers, keyed by (source, crs, simplify)
+_memory = {}
+
+
+# -------------------------
+# CACHE FILES
+# -------------------------
+def crs_key(crs):
+    """Short, stable name for a CRS: EPSG code when there is one, else a WKT hash."""
+    if crs is None:
+        return "native"
+    crs = CRS.from_user_input(crs)
+    epsg = crs.to_epsg()
+    if epsg is not None:
+        return f"epsg{epsg}"
+    return "wkt" + hashlib.sha1(crs.to_wkt().encode()).hexdigest()[:12]
+
+
+def cache_path(source, crs=None, simplify=None):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    name = f"{stem}_{crs_key(crs)}"
+    if simplify:
+        name += f"_simplify{simplify:g}"
+    return os.path.join(cache_folder, name + ".parquet")
+
+
+def _fresh(cache, source):
+    return os.path.exists(cache) and (
+        not os.path.exists(source) or os.path.getmtime(cache) >= os.path.getmtime(source)
+    )
+
+
+def _write(gdf, path):
+    atomic_write(path, gdf.to_parquet)
+
+
+# -------------------------
+# LOAD
+# -------------------------
+def load_regions(crs=None, simplify=None, source=shp_path):
+    """
+    District boundaries, optionally reprojected to `crs` and simplified
+    (tolerance in units of that CRS). Every variant is converted once to
+    GeoParquet; later calls read it back instead of parsing the shapefile
+    and reprojecting. Stale caches (older than the shapefile) are rebuilt.
+    The returned GeoDataFrame is shared between callers: copy before modifying.
+    """
+    key = (source, crs_key(crs), simplify)
+    if key in _memory:
+        return _memory[key]
+
+    path = cache_path(source, crs, simplify)
+    if _fresh(path, source):
+        gdf = gpd.read_parquet(path)
+    else:
+        base_path = cache_path(source)
+        if _fresh(base_path, source):
+            gdf = gpd.read_parquet(base_path)
+        else:
+            gdf = gpd.read_file(source)
+            _write(gdf, base_path)
+
+        if crs is not None and not gdf.crs.equals(CRS.from_user_input(crs)):
+            gdf = gdf.to_crs(crs)
+        if simplify:
+            gdf = gdf.assign(geometry=gdf.geometry.simplify(simplify, preserve_topology=True))
+        if path != base_path:
+            _write(gdf, path)
+
+    _memory[key] = gdf
+    return gdf
+
+
+if __name__ == "__main__":
+    # Pre-build the projections used by the pipeline: python geometry_store.py EPSG:2056 EPSG:4326
+    targets = sys.argv[1:] or ["EPSG:2056"]
+    for target in targets:
+        start = time.perf_counter()
+        regions = load_regions(crs=target)
+        print(f"{target}: {len(regions)} districts -> {cache_path(shp_path, target)} "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
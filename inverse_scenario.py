@@ -0,0 +1,105 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from logistic_model import growth_rate, load_region_parameters
+
+# -------------------------
+# SETTINGS
+# -------------------------
+params_path = "fitted_parameters.csv"
+out_path = os.path.join("Results", "required_rates.csv")
+
+END_YEAR = 2050
+RATE_BRACKET = (-0.2, 0.2)   # annual NO2 change rates searched (-20%/yr .. +20%/yr)
+TOL = 1e-8
+
+
+# -------------------------
+# CLOSED FORM
+# -------------------------
+# With r constant over each year, the logistic solution after n years is
+#     B_n = K / (1 + (K/B0 - 1) * exp(-R_n)),   R_n = sum_i r(P_i)
+# so "B_end >= T" is a condition on the cumulated rate R_n alone.
+
+def cumulated_rate(r0, alpha, P_last, rate, n_years):
+    """R_n for every region (vectors) and one annual change rate per region."""
+    i = np.arange(1, n_years + 1)
+    P = P_last[:, None] * (1.0 + rate[:, None]) ** i
+    return growth_rate(r0[:, None], alpha[:, None], P).sum(axis=1)
+
+
+def target_met(R, K, B0, T):
+    """B_end >= T, whether B0 starts below or above K."""
+    B_end = K / (1.0 + (K / B0 - 1.0) * np.exp(-R))
+    return B_end >= T
+
+
+# -------------------------
+# VECTORIZED BISECTION
+# -------------------------
+def required_rates(params, target, end_year=END_YEAR, bracket=RATE_BRACKET, tol=TOL):
+    """
+    For every region, the constant annual NO2 change rate at which NDVI in end_year
+    is exactly the target (bisection run on all regions at once).
+    'condition' tells which side meets the target: rate <= g*, rate >= g*,
+    always (whole bracket) or never.
+    """
+    first_year = int(params["last_year"].max()) + 1
+    n_years = end_year - first_year + 1
+
+    r0 = params["r0_global"].to_numpy(dtype=float)
+    alpha = params["alpha_global"].to_numpy(dtype=float)
+    K = params["K_estimated"].to_numpy(dtype=float)
+    B0 = params["B0_estimated"].to_numpy(dtype=float)
+    P_last = params["last_NO2"].to_numpy(dtype=float)
+    T = np.broadcast_to(np.asarray(target, dtype=float), K.shape)
+
+    def met(rate):
+        return target_met(cumulated_rate(r0, alpha, P_last, rate, n_years), K, B0, T)
+
+    lo = np.full(len(K), bracket[0])
+    hi = np.full(len(K), bracket[1])
+    ok_lo, ok_hi = met(lo), met(hi)
+    bracketed = ok_lo != ok_hi
+
+    # Invariant: met(lo) == ok_lo, met(hi) == ok_hi
+    n_iter = int(np.ceil(np.log2((bracket[1] - bracket[0]) / tol)))
+    for _ in range(n_iter):
+        mid = 0.5 * (lo + hi)
+        same_as_lo = met(mid) == ok_lo
+        lo = np.where(bracketed & same_as_lo, mid, lo)
+        hi = np.where(bracketed & ~same_as_lo, mid, hi)
+
+    # Report the bracket end that still meets the target
+    rate = np.where(ok_lo, lo, hi)
+    condition = np.select(
+        [~bracketed & ok_lo, ~bracketed & ~ok_lo, ok_lo],
+        ["always", "never", "rate <= required_rate"],
+        default="rate >= required_rate",
+    )
+    rate = np.where(bracketed, rate, np.nan)
+
+    return pd.DataFrame({
+        "Region": params.index,
+        "Target": T,
+        "End_year": end_year,
+        "required_rate": rate,
+        "condition": condition,
+    })
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit("Usage: python inverse_scenario.py <target NDVI> [end year]")
+    target = float(sys.argv[1])
+    end_year = int(sys.argv[2]) if len(sys.argv) > 2 else END_YEAR
+
+    params = load_region_parameters(params_path)
+    table = required_rates(params, target, end_year)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    table.to_csv(out_path, index=False)
+    print(table["condition"].value_counts().to_string())
+    print(f"saved {out_path}")
@@ -0,0 +1,138 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+from scipy.sparse import hstack, csr_matrix
+
+# -------------------------
+# SETTINGS
+# -------------------------
+input_path = "NDVI_NO2_timeseries.csv"
+output_path = "fitted_parameters_joint.csv"
+
+# Bounds: log(r0), alpha, then K and B0 of every region (same K/B0 bounds as main.py)
+LOG_R0_BOUNDS = (np.log(1e-8), np.log(10.0))
+ALPHA_BOUNDS = (-np.inf, np.inf)
+K_BOUNDS = (0.1, 2.0)
+B0_BOUNDS = (1e-6, 2.0)
+
+
+# -------------------------
+# DATA LAYOUT
+# -------------------------
+def prepare(df):
+    """
+    Observations sorted by region then year, with the bookkeeping the
+    residual function needs (region of each row, first row of each region,
+    years until the next observation).
+    """
+    df = df.dropna(subset=["Mean_NDVI", "Mean_NO2"]).sort_values(["Region", "Year"]).reset_index(drop=True)
+    regions, region_of_row = np.unique(df["Region"].values, return_inverse=True)
+
+    years = df["Year"].to_numpy(dtype=float)
+    starts = np.flatnonzero(np.r_[True, region_of_row[1:] != region_of_row[:-1]])
+
+    # Pollution of year k drives growth until the next observed year
+    dt = np.r_[np.diff(years), 0.0]
+    dt[np.r_[starts[1:] - 1, len(df) - 1]] = 0.0
+
+    return df, regions, region_of_row, starts, dt
+
+
+def cumulated_rate(log_r0, alpha, P, dt, starts, region_of_row):
+    """R at every observation: sum of r0*exp(-alpha*P) over the preceding years of the same region."""
+    term = np.exp(log_r0 - alpha * P) * dt
+    cs = np.cumsum(term)
+    exclusive = cs - term
+    # Remove what earlier regions contributed
+    return exclusive - exclusive[starts][region_of_row]
+
+
+# -------------------------
+# JOINT PROBLEM
+# -------------------------
+def residuals(theta, B, P, dt, starts, region_of_row, n_regions):
+    log_r0, alpha = theta[0], theta[1]
+    K = theta[2:2 + n_regions][region_of_row]
+    B0 = theta[2 + n_regions:][region_of_row]
+    R = cumulated_rate(log_r0, alpha, P, dt, starts, region_of_row)
+    return K / (1.0 + (K / B0 - 1.0) * np.exp(-R)) - B
+
+
+def jacobian_sparsity(region_of_row, n_regions):
+    """
+    Rows depend on the two shared parameters and on their own region's K and B0 only:
+    two dense columns followed by two block-diagonal one-per-region blocks.
+    """
+    m = len(region_of_row)
+    rows = np.arange(m)
+    shared = csr_matrix(np.ones((m, 2), dtype=np.int8))
+    own = csr_matrix((np.ones(m, dtype=np.int8), (rows, region_of_row)), shape=(m, n_regions))
+    return hstack([shared, own, own]).tocsr()
+
+
+def fit_joint(df, verbose=0):
+    """
+    Fit (r0, alpha) shared by all regions and (K, B0) per region directly on
+    every NDVI observation, through r = r0*exp(-alpha*P), as a single bounded
+    nonlinear least-squares problem.
+    """
+    df, regions, region_of_row, starts, dt = prepare(df)
+    n = len(regions)
+    B = df["Mean_NDVI"].to_numpy(dtype=float)
+    P = df["Mean_NO2"].to_numpy(dtype=float)
+
+    # Starting point: first value and max + 0.1 per region, as main.py
+    first = B[starts]
+    K0 = np.clip(pd.Series(B).groupby(region_of_row).max().to_numpy() + 0.1, *K_BOUNDS)
+    B00 = np.clip(first, *B0_BOUNDS)
+    theta0 = np.r_[np.log(0.1), 0.0, K0, B00]
+
+    lower = np.r_[LOG_R0_BOUNDS[0], ALPHA_BOUNDS[0], np.full(n, K_BOUNDS[0]), np.full(n, B0_BOUNDS[0])]
+    upper = np.r_[LOG_R0_BOUNDS[1], ALPHA_BOUNDS[1], np.full(n, K_BOUNDS[1]), np.full(n, B0_BOUNDS[1])]
+    theta0 = np.clip(theta0, lower + 1e-12, upper - 1e-12)
+
+    result = least_squares(
+        residuals, theta0,
+        jac_sparsity=jacobian_sparsity(region_of_row, n),
+        bounds=(lower, upper),
+        method="trf", tr_solver="lsmr", x_scale="jac",
+        args=(B, P, dt, starts, region_of_row, n),
+        verbose=verbose,
+    )
+
+    theta = result.x
+    r0, alpha = np.exp(theta[0]), theta[1]
+    params = pd.DataFrame({
+        "Region": regions,
+        "K_estimated": theta[2:2 + n],
+        "B0_estimated": theta[2 + n:],
+    })
+    return df, params, r0, alpha, result
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else input_path
+    data = pd.read_csv(path)
+
+    start = time.perf_counter()
+    df, params, r0, alpha, result = fit_joint(data)
+    elapsed = time.perf_counter() - start
+
+    print("-------------------------------------------------")
+    print("Joint Fitted Parameters:")
+    print(f"  r0     = {r0:.6f}")
+    print(f"  alpha  = {alpha:.6f}")
+    print(f"  RMSE   = {np.sqrt(np.mean(result.fun ** 2)):.6f}  ({result.nfev} evaluations, {elapsed:.2f} s)")
+    print("-------------------------------------------------")
+
+    # Same layout as fitted_parameters.csv from main.py (one row per region and year),
+    # with r_estimated the region's rate at its mean NO2
+    out = df[["Region", "Year", "Mean_NO2", "Mean_NDVI"]].merge(params, on="Region")
+    mean_P = out.groupby("Region")["Mean_NO2"].transform("mean")
+    out.insert(4, "r_estimated", r0 * np.exp(-alpha * mean_P))
+    out["r0_global"] = r0
+    out["alpha_global"] = alpha
+    out.to_csv(output_path, index=False)
+    print(f"saved {output_path}")
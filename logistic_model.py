@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# SETTINGS (same as the regional model of ndvi_sim.c)
+# -------------------------
+STEPS_PER_YEAR = 100
+DT = 1.0 / STEPS_PER_YEAR
+
+# Annual NO2 change rate of the standard scenarios (future_NO2_*.csv in main.py)
+scenarios = {
+    "constant": 0.0,
+    "minus1percent": -0.01,
+    "plus1percent": 0.01,
+}
+
+
+# -------------------------
+# MODEL
+# -------------------------
+def logistic(t, r, K, B0):
+    return K / (1 + (K/B0 - 1)*np.exp(-r*t))
+
+
+def growth_rate(r0, alpha, P):
+    """r(P) = r0 * exp(-alpha * P)"""
+    return r0 * np.exp(-alpha * P)
+
+
+def pollution_trajectory(P_last, rate, n_years):
+    """
+    Future pollution starting from the last observed value:
+    P_i = P_last * (1 + rate)^(i+1), i = 0 .. n_years-1 (as make_rows() in main.py).
+    Broadcasts over P_last and rate, years on the last axis.
+    """
+    P_last = np.asarray(P_last, dtype=float)[..., None]
+    rate = np.asarray(rate, dtype=float)[..., None]
+    i = np.arange(1, n_years + 1)
+    return P_last * (1.0 + rate) ** i
+
+
+def logistic_step(B, K, r, steps_per_year=STEPS_PER_YEAR):
+    """
+    Advance B by one year at a constant rate r.
+    steps_per_year sub-steps of explicit Euler reproduce ndvi_sim.c --model regional;
+    steps_per_year=None uses the exact logistic solution over the year.
+    """
+    if steps_per_year is None:
+        return K / (1.0 + (K / B - 1.0) * np.exp(-r))
+    dt = 1.0 / steps_per_year
+    for _ in range(steps_per_year):
+        B = B + dt * r * B * (1.0 - B / K)
+    return B
+
+
+def simulate_logistic(B0, K, r, steps_per_year=STEPS_PER_YEAR):
+    """
+    Simulate NDVI year by year, vectorized over any leading axes.
+    r holds the growth rate of each year on its last axis; B0 and K broadcast against r[..., 0].
+    Returns B at the end of each year.
+    """
+    r = np.asarray(r, dtype=float)
+    K = np.asarray(K, dtype=float)
+    B0 = np.asarray(B0, dtype=float)
+    shape = np.broadcast_shapes(B0.shape, K.shape, r.shape[:-1])
+    B = np.broadcast_to(B0, shape).copy()
+    out = np.empty(shape + r.shape[-1:])
+
+    for y in range(r.shape[-1]):
+        B = logistic_step(B, K, r[..., y], steps_per_year)
+        out[..., y] = B
+
+    return out
+
+
+def simulate_coupled(B0, K, r, coupling, diffusion, steps_per_year=STEPS_PER_YEAR):
+    """
+    Same as simulate_logistic but with all regions advanced together and
+    exchanging NDVI with their neighbours at every sub-step:
+        dB/dt = r B (1 - B/K) + diffusion * (coupling @ B - rowsum * B)
+    Regions are on the first axis; coupling is a row-normalized sparse
+    (n_regions x n_regions) matrix, so the exchange costs one sparse
+    mat-vec per sub-step. A region without neighbours (zero row) exchanges
+    nothing and follows simulate_logistic, as does everything with diffusion=0.
+    """
+    if steps_per_year is None:
+        raise ValueError("the coupled model needs Euler sub-steps (steps_per_year)")
+    r = np.asarray(r, dtype=float)
+    K = np.asarray(K, dtype=float)
+    B0 = np.asarray(B0, dtype=float)
+    shape = np.broadcast_shapes(B0.shape, K.shape, r.shape[:-1])
+    B = np.broadcast_to(B0, shape).copy()
+    out = np.empty(shape + r.shape[-1:])
+
+    n = shape[0]
+    rowsum = np.asarray(coupling.sum(axis=1), dtype=float).reshape((n,) + (1,) * (len(shape) - 1))
+    dt = 1.0 / steps_per_year
+    for y in range(r.shape[-1]):
+        ry = r[..., y]
+        for _ in range(steps_per_year):
+            exchange = (coupling @ B.reshape(n, -1)).reshape(shape) - rowsum * B
+            B = B + dt * (ry * B * (1.0 - B / K) + diffusion * exchange)
+        out[..., y] = B
+
+    return out
+
+
+# -------------------------
+# PARAMETERS
+# -------------------------
+PARAM_COLUMNS = ["r_estimated", "K_estimated", "B0_estimated", "r0_global", "alpha_global"]
+
+
+def region_parameter_table(fitted_df, columns=PARAM_COLUMNS):
+    """
+    Normalized parameters: one row per region, indexed by Region.
+    fitted_parameters.csv repeats them on every observed year; the first row is kept.
+    """
+    cols = [c for c in columns if c in fitted_df.columns]
+    return fitted_df.drop_duplicates("Region", keep="first").set_index("Region")[cols]
+
+
+def attach_region_parameters(scenario_df, params):
+    """
+    Add the parameter columns of `params` (one row per region) to every scenario row.
+    A hash lookup of each row's region followed by a positional take:
+    the output has exactly len(scenario_df) rows, nothing is duplicated then dropped.
+    """
+    codes = params.index.get_indexer(scenario_df["Region"])
+    missing = codes < 0
+
+    out = scenario_df.copy()
+    for c in params.columns:
+        values = params[c].to_numpy()
+        col = values.take(np.where(missing, 0, codes))
+        if missing.any():
+            col = np.where(missing, np.nan, col)
+        out[c] = col
+    return out
+
+
+def load_region_parameters(path="fitted_parameters.csv"):
+    """
+    One row per region from the per-year table written by main.py:
+    r_estimated, K_estimated, B0_estimated, r0_global, alpha_global,
+    plus the last observed year and NO2 (starting point of the scenarios).
+    """
+    df = pd.read_csv(path).sort_values(["Region", "Year"])
+    last = df.groupby("Region", sort=True).last()
+
+    params = last[PARAM_COLUMNS].copy()
+    params["last_year"] = last["Year"].astype(int)
+    params["last_NO2"] = last["Mean_NO2"]
+    return params
@@ -2,19 +2,23 @@ import pandas as pd
 import numpy as np
 from scipy.optimize import curve_fit, OptimizeWarning
 import warnings
-import geopandas as gpd
 import rasterio
 import rasterio.mask
 import glob
 import re
+import sys
+
+from compact import COMPACT, masked_mean, read_csv_compact
+from geometry_store import load_regions
+from logistic_model import region_parameter_table, attach_region_parameters
+from checkpoint import Checkpoint, run_units
+from packed_rasters import PACKED, open_packed
 
 #ello
 
 # -------------------------
 # FILE SETTINGS
 # -------------------------
-shp_path = "swissBOUNDARIES3D_1_5_TLM_BEZIRKSGEBIET.shp"
-
 # Pattern matching files like NDVI_2010.tif ... NDVI_2018.tif
 ndvi_files = sorted(glob.glob("NDVI_*.tif"))
 no2_files  = sorted(glob.glob("NO2_*.tif"))
@@ -23,31 +27,42 @@ no2_files  = sorted(glob.glob("NO2_*.tif"))
 year_pattern = re.compile(r".*_(\d{4})\.tif$")
 
 # -------------------------
-# STEP 1 — Load Shapefile
+# STEP 1 — Load Shapefile (cached GeoParquet after the first run)
 # -------------------------
-regions = gpd.read_file(shp_path)
+regions = load_regions()
 
 # -------------------------
 # FUNCTION: extract mean raster value for a region
 # -------------------------
 def extract_mean_per_region(raster_path, regions):
+    if PACKED:
+        # One bincount over the packed valid cells, then the requested regions
+        grid, key = open_packed(raster_path)
+        return grid.regional_means(key).reindex(regions.index).tolist()
+
     results = []
 
     with rasterio.open(raster_path) as src:
-        # Reproject shapefile to match raster CRS
-        regions_proj = regions.to_crs(src.crs)
+        # Boundaries already projected to the raster CRS (reprojected once, then cached),
+        # restricted to the requested regions
+        regions_proj = load_regions(crs=src.crs).loc[regions.index]
         nodata = src.nodata
 
         for i, row in regions_proj.iterrows():
             geom = [row.geometry]
 
             try:
-                masked, _ = rasterio.mask.mask(src, geom, crop=True)
+                masked, _ = rasterio.mask.mask(src, geom, crop=True, filled=not COMPACT)
             except ValueError:
                 # Region does not overlap raster
                 results.append(np.nan)
                 continue
 
+            if COMPACT:
+                # Native dtype, nodata and outside pixels masked: no float64 copy
+                results.append(masked_mean(masked))
+                continue
+
             masked = masked.astype(float)
             if nodata is not None:
                 masked[masked == nodata] = np.nan
@@ -57,13 +72,30 @@ def extract_mean_per_region(raster_path, regions):
     return results
 
 # -------------------------
-# STEP 2 — MASTER LIST TO STORE RESULTS
+# STEP 2 — CHECKPOINTED WORK UNITS (one year x one chunk of regions)
+# Run with --resume to continue an interrupted extraction
 # -------------------------
-all_rows = []
+REGION_CHUNK = 20
+checkpoint = Checkpoint("extraction", resume="--resume" in sys.argv)
+
+
+def extract_unit(year, ndvi_path, no2_path, chunk):
+    # ---- Extract NDVI and NO2 for this year and these regions
+    ndvi_vals = extract_mean_per_region(ndvi_path, chunk)
+    no2_vals = extract_mean_per_region(no2_path, chunk)
+
+    return pd.DataFrame({
+        "Region": chunk["NAME"].values,
+        "Year": year,
+        "Mean_NDVI": ndvi_vals,
+        "Mean_NO2": no2_vals,
+    })
+
 
 # -------------------------
 # STEP 3 — LOOP THROUGH YEARS
 # -------------------------
+units = []
 for ndvi_path, no2_path in zip(ndvi_files, no2_files):
 
     # Extract year from filename
@@ -73,27 +105,17 @@ for ndvi_path, no2_path in zip(ndvi_files, no2_files):
         continue
 
     year = int(match.group(1))
-    print(f"Processing year {year} ...")
+    for start in range(0, len(regions), REGION_CHUNK):
+        chunk = regions.iloc[start:start + REGION_CHUNK]
+        units.append((f"{year}_{start}", (year, ndvi_path, no2_path, chunk)))
 
-    # ---- Extract NDVI for this year
-    ndvi_vals = extract_mean_per_region(ndvi_path, regions)
-
-    # ---- Extract NO2 for this year
-    no2_vals = extract_mean_per_region(no2_path, regions)
-
-    # ---- Append results
-    for region_name, ndvi_val, no2_val in zip(regions["NAME"], ndvi_vals, no2_vals):
-        all_rows.append({
-            "Region": region_name,
-            "Year": year,
-            "Mean_NDVI": ndvi_val,
-            "Mean_NO2": no2_val
-        })
+print(f"Processing {len(units)} units (year x {REGION_CHUNK} regions) ...")
+all_rows = run_units(checkpoint, units, extract_unit)
 
 # -------------------------
 # STEP 4 — CREATE FINAL CSV
 # -------------------------
-df = pd.DataFrame(all_rows)
+df = all_rows
 df = df.sort_values(["Region", "Year"])
 df.to_csv("NDVI_NO2_timeseries.csv", index=False)
 
@@ -105,7 +127,7 @@ warnings.filterwarnings("ignore", category=OptimizeWarning)
 # ------------------------------------------------------
 # 1. Load dataset
 # ------------------------------------------------------
-df = pd.read_csv("NDVI_NO2_timeseries.csv")
+df = read_csv_compact("NDVI_NO2_timeseries.csv") if COMPACT else pd.read_csv("NDVI_NO2_timeseries.csv")
 
 # Remove rows missing NDVI or NO₂
 df = df.dropna(subset=["Mean_NDVI", "Mean_NO2"])
@@ -278,6 +300,10 @@ for col in cols_to_drop:
         df_fitted = df_fitted.drop(columns=[col])
         print(f"Supprimé du fitted_parameters : {col}")
 
+# Table normalisée des paramètres : une ligne par région
+region_params = region_parameter_table(df_fitted, [c for c in df_fitted.columns if c != "Region"])
+region_params.to_csv("region_parameters.csv")
+
 # --- 2. Charger les scénarios NO2 ---
 scenario_const = pd.read_csv("future_NO2_constant.csv")
 scenario_minus = pd.read_csv("future_NO2_minus1percent.csv")
@@ -285,36 +311,30 @@ scenario_plus  = pd.read_csv("future_NO2_plus1percent.csv")
 
 
 # --- 3. Fonction pour merger proprement SANS créer de doublons ---
-def merge_and_clean(scenario_df, fitted_df, scenario_name):
+def merge_and_clean(scenario_df, params, scenario_name):
 
     print(f"\n--- Traitement du scénario : {scenario_name} ---")
 
-    # 3A. Retirer du fitted_parameters les colonnes déjà présentes dans le scénario
-    overlapping = [c for c in fitted_df.columns if c in scenario_df.columns and c != "Region"]
+    # 3A. Retirer des paramètres les colonnes déjà présentes dans le scénario
+    overlapping = [c for c in params.columns if c in scenario_df.columns]
 
     if overlapping:
         print(f"Colonnes supprimées pour éviter doublons : {overlapping}")
-        fitted_clean = fitted_df.drop(columns=overlapping)
-    else:
-        fitted_clean = fitted_df.copy()
-
-    # 3B. Merge propre
-    merged = scenario_df.merge(fitted_clean, on="Region", how="left")
+        params = params.drop(columns=overlapping)
 
-    # 3C. Supprimer les doublons (le vrai problème !)
-    before = len(merged)
-    merged = merged.drop_duplicates(subset=["Region", "Year"], keep="first")
-    after = len(merged)
+    # 3B. Jointure indexée sur Region (une ligne par région) :
+    # aucune ligne dupliquée n'est créée, donc rien à supprimer ensuite
+    merged = attach_region_parameters(scenario_df, params)
 
-    print(f"Doublons supprimés : {before - after}")
+    print(f"Lignes : {len(merged)}")
 
     return merged
 
 
 # --- 4. Appliquer la fonction aux 3 scénarios ---
-clean_const = merge_and_clean(scenario_const, df_fitted, "NO2 constant")
-clean_minus = merge_and_clean(scenario_minus, df_fitted, "NO2 -1%/an")
-clean_plus  = merge_and_clean(scenario_plus, df_fitted, "NO2 +1%/an")
+clean_const = merge_and_clean(scenario_const, region_params, "NO2 constant")
+clean_minus = merge_and_clean(scenario_minus, region_params, "NO2 -1%/an")
+clean_plus  = merge_and_clean(scenario_plus, region_params, "NO2 +1%/an")
 
 
 # --- 5. Sauvegarder les CSV finaux propres ---
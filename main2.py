@@ -1,9 +1,14 @@
 import os
-import glob
 import re
 import numpy as np
 import pandas as pd
 import rasterio
+
+from compact import COMPACT, read_band_masked, masked_mean
+from rollups import load_district_stats, rollup, build_stats
+from geometry_store import shp_path
+from packed_rasters import PACKED, open_packed
+from subannual_ingest import ingest, annual_rasters
 import warnings
 from sklearn.linear_model import LinearRegression
 from scipy.optimize import curve_fit, OptimizeWarning
@@ -12,7 +17,6 @@ from scipy.optimize import curve_fit, OptimizeWarning
 # SETTINGS
 # -------------------------
 data_folder = "data"
-pattern = os.path.join(data_folder, "*.tif")
 
 year_regex = re.compile(r".*_(\d{4})\.tif$")
 pollutant_regex = re.compile(r"([^/\\]+)_\d{4}\.tif$")  # capture pollutant before _YEAR.tif
@@ -22,7 +26,13 @@ pollutant_regex = re.compile(r"([^/\\]+)_\d{4}\.tif$")  # capture pollutant befo
 # -------------------------
 def extract_mean_country(raster_path):
     """Compute mean over the entire raster (ignoring nodata)."""
+    if PACKED:
+        # Valid cells only, packed once per raster
+        grid, key = open_packed(raster_path)
+        return grid.national_mean(key)
     with rasterio.open(raster_path) as src:
+        if COMPACT:
+            return masked_mean(read_band_masked(src))
         arr = src.read(1).astype(float)
         nodata = src.nodata
         if nodata is not None:
@@ -110,7 +120,11 @@ else:
 # -------------------------
 # PROCESS ALL TIF FILES IN data/
 # -------------------------
-tif_files = sorted(glob.glob(pattern))
+# Monthly / daily grids in data/subannual/ are first aggregated to annual
+# composites in data/composites/, read below with the provider's annual files
+ingest()
+
+tif_files = annual_rasters(data_folder)
 if len(tif_files) == 0:
     raise SystemExit("No .tif files found in data/")
 
@@ -125,12 +139,20 @@ for tif in tif_files:
     pollutant_full = m_poll.group(1)  # e.g., NO2 or O3 or PM10
     # clean pollutant name (remove potential suffixes)
     pollutant = pollutant_full.strip()
-    print(f"Processing {pollutant} - {year}")
-    mean_val = extract_mean_country(tif)
-    rows.append({"Year": year, "Pollutant": pollutant, "Mean_Value": mean_val})
+    rows.append({"Year": year, "Pollutant": pollutant, "Path": tif})
 
 df_long = pd.DataFrame(rows)
 
+if os.path.exists(shp_path):
+    # National means rolled up from the district pixel sums/counts:
+    # only rasters not yet in Results/district_stats.csv are read
+    national = rollup(build_stats(df_long["Path"].tolist()))
+    national = national.rename(columns={"Variable": "Pollutant", "Mean": "Mean_Value"})
+    df_long = df_long.merge(national[["Year", "Pollutant", "Mean_Value"]], on=["Year", "Pollutant"], how="left")
+else:
+    # No district boundaries: mean over every valid pixel of each raster
+    df_long["Mean_Value"] = [extract_mean_country(tif) for tif in df_long["Path"]]
+
 # -------------------------
 # PIVOT to wide
 # -------------------------
@@ -180,12 +202,22 @@ ndvi_df = pd.read_csv(ndvi_path)
 ndvi_df = ndvi_df[(ndvi_df["Year"] >= 2010) & (ndvi_df["Year"] <= 2018)]
 
 # Compute national NDVI per year
-ndvi_national = (
-    ndvi_df.groupby("Year")["Mean_NDVI"]
-    .mean()
-    .reset_index()
-    .rename(columns={"Mean_NDVI": "NDVI"})
-)
+# (area-weighted from the stored district pixel sums/counts when available,
+#  otherwise the unweighted mean of district means)
+district_stats = load_district_stats()
+if district_stats is not None and (district_stats["Variable"] == "NDVI").any():
+    ndvi_national = (
+        rollup(district_stats[district_stats["Variable"] == "NDVI"])[["Year", "Mean"]]
+        .rename(columns={"Mean": "NDVI"})
+    )
+    ndvi_national = ndvi_national[(ndvi_national["Year"] >= 2010) & (ndvi_national["Year"] <= 2018)]
+else:
+    ndvi_national = (
+        ndvi_df.groupby("Year")["Mean_NDVI"]
+        .mean()
+        .reset_index()
+        .rename(columns={"Mean_NDVI": "NDVI"})
+    )
 
 print("National NDVI computed:\n", ndvi_national)
 
@@ -0,0 +1,142 @@
+import json
+import sys
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from logistic_model import (
+    growth_rate, pollution_trajectory, simulate_logistic, load_region_parameters,
+)
+
+# -------------------------
+# SETTINGS
+# -------------------------
+HOST = "127.0.0.1"
+PORT = 8050
+params_path = "fitted_parameters.csv"
+CACHE_SIZE = 4096
+MAX_YEAR = 2100   # same horizon as threshold_query
+model_columns = ["last_NO2", "r0_global", "alpha_global", "B0_estimated", "K_estimated"]
+
+# -------------------------
+# Parameters stay in memory for the lifetime of the server
+# -------------------------
+params = load_region_parameters(params_path)
+first_year = int(params["last_year"].max()) + 1
+
+
+class MissingParameters(Exception):
+    """The region exists but has no usable fit (e.g. no NO2 observation)."""
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def simulate_region(region, rate):
+    """Full NDVI trajectory first_year..MAX_YEAR for one region and one annual NO2 change rate."""
+    p = params.loc[region]
+    n_years = MAX_YEAR - first_year + 1
+
+    P = pollution_trajectory(p["last_NO2"], rate, n_years)
+    r = growth_rate(p["r0_global"], p["alpha_global"], P)
+    B = simulate_logistic(p["B0_estimated"], p["K_estimated"], r)
+
+    # Read-only so cached arrays cannot be modified by callers
+    B.setflags(write=False)
+    return B
+
+
+def query_ndvi(region, rate, start, end):
+    if region not in params.index:
+        raise KeyError(f"Unknown region: {region}")
+    if start < first_year or end < start or end > MAX_YEAR:
+        raise ValueError(f"Years must satisfy {first_year} <= start <= end <= {MAX_YEAR}")
+    if not np.isfinite(rate):
+        raise ValueError("rate must be a finite number")
+    missing = [c for c in model_columns if not np.isfinite(params.at[region, c])]
+    if missing:
+        raise MissingParameters(f"No {', '.join(missing)} for region {region}")
+
+    # Rounded so that 0.01 and 0.010000000001 share the same cache entry
+    # Any start/end of the same region and rate is a slice of one cached trajectory
+    B = simulate_region(region, round(rate, 6))
+    years = np.arange(start, end + 1)
+    return {
+        "region": region,
+        "rate": rate,
+        "years": years.tolist(),
+        "ndvi": B[start - first_year:end - first_year + 1].tolist(),
+    }
+
+
+# -------------------------
+# HTTP HANDLER
+# -------------------------
+class NDVIHandler(BaseHTTPRequestHandler):
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        qs = parse_qs(url.query)
+
+        if url.path == "/regions":
+            self._send(200, {"regions": params.index.tolist(), "first_year": first_year})
+            return
+
+        if url.path == "/cache":
+            info = simulate_region.cache_info()
+            self._send(200, info._asdict())
+            return
+
+        if url.path != "/ndvi":
+            self._send(404, {"error": f"Unknown endpoint {url.path}"})
+            return
+
+        # /ndvi?region=Aarau&rate=-0.01&start=2019&end=2050
+        if "region" not in qs:
+            self._send(400, {"error": "Missing query parameter: region"})
+            return
+        try:
+            region = qs["region"][0]
+            rate = float(qs.get("rate", ["0"])[0])
+            start = int(qs.get("start", [str(first_year)])[0])
+            end = int(qs.get("end", ["2050"])[0])
+
+            t0 = time.perf_counter()
+            result = query_ndvi(region, rate, start, end)
+            result["elapsed_ms"] = (time.perf_counter() - t0) * 1000
+        except KeyError as e:
+            self._send(404, {"error": e.args[0]})
+            return
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+            return
+        except MissingParameters as e:
+            self._send(422, {"error": str(e)})
+            return
+
+        self._send(200, result)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    server = ThreadingHTTPServer((HOST, port), NDVIHandler)
+    print(f"NDVI query service on http://{HOST}:{port}  ({len(params)} regions loaded)")
+    print(f"  GET /ndvi?region=<name>&rate=<annual change>&start=<year>&end=<year>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
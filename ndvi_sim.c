@@ -0,0 +1,514 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <stdint.h>
+
+/* -----------------------------------------------------------
+   Simulateur NDVI unique (remplace growth_sim_30years.c et simulate_ndvi.c)
+
+   Modèle "regional" (ex growth_sim_30years.c) :
+       r(P) = r0 * exp(-alpha * P), Euler explicite, STEPS sous-pas par an
+       colonnes : Region,Year,NO2|P,r0_global,alpha_global,K_estimated,B0_estimated
+   Modèle "national" (ex simulate_ndvi.c) :
+       r(P) = r0 * exp(P), pas logistique analytique d'un an, NDVI borné dans [0,1]
+       colonnes : Year,P,r0,K,B0 (Region optionnelle)
+
+   Les colonnes sont trouvées par leur nom, dans n'importe quel ordre.
+   Aucune limite fixe : nombre de lignes, de régions, d'années, longueur des
+   lignes et des noms de régions sont tous dynamiques.
+
+   Usage :
+     ndvi_sim [--model regional|national] [--steps N] [--combined sortie.csv]
+              label=entree.csv[:sortie.csv] ...
+   Sans argument : les trois scénarios régionaux de growth_sim_30years.c.
+   Exemple (équivalent de simulate_ndvi.c) :
+     ndvi_sim --model national --combined ndvi_futur_combined.csv \
+              up=scenario_P_up.csv down=scenario_P_down.csv cst=scenario_P_constant.csv
+   ----------------------------------------------------------- */
+
+#define IO_BUFFER (1 << 20)
+#define DEFAULT_STEPS 100
+
+enum { MODEL_REGIONAL, MODEL_NATIONAL };
+
+typedef struct {
+    int    region;   /* identifiant dans la table des régions */
+    int    year;
+    double P;
+    double r0;
+    double alpha;
+    double K;
+    double B0;
+    double B;        /* NDVI simulé en fin d'année */
+} Row;
+
+typedef struct {
+    const char *label;
+    const char *input;
+    const char *output;
+    Row   *rows;
+    size_t n, cap;
+    /* index (région, année) -> ligne, adressage ouvert */
+    int64_t *slots;
+    size_t   nslots;
+} Scenario;
+
+/* -------------------------
+   Allocation
+   ------------------------- */
+static void *xrealloc(void *p, size_t size) {
+    void *q = realloc(p, size);
+    if (!q && size) {
+        fprintf(stderr, "Erreur: allocation mémoire\n");
+        exit(1);
+    }
+    return q;
+}
+
+static char *xstrdup(const char *s) {
+    size_t n = strlen(s) + 1;
+    char *d = xrealloc(NULL, n);
+    memcpy(d, s, n);
+    return d;
+}
+
+/* -------------------------
+   Hachage
+   ------------------------- */
+static uint64_t hash_str(const char *s) {
+    uint64_t h = 1469598103934665603ULL;          /* FNV-1a */
+    while (*s) { h ^= (unsigned char)*s++; h *= 1099511628211ULL; }
+    return h;
+}
+
+static uint64_t hash_key(int region, int year) {
+    uint64_t h = ((uint64_t)(uint32_t)region << 32) | (uint32_t)year;
+    h ^= h >> 33; h *= 0xff51afd7ed558ccdULL;
+    h ^= h >> 33; h *= 0xc4ceb9fe1a85ec53ULL;
+    h ^= h >> 33;
+    return h;
+}
+
+/* -------------------------
+   Table des régions (nom <-> identifiant)
+   ------------------------- */
+static char  **region_names = NULL;
+static size_t  n_regions = 0, cap_regions = 0;
+static int    *region_slots = NULL;     /* -1 = vide */
+static size_t  n_region_slots = 0;
+
+static void region_rehash(size_t nslots) {
+    free(region_slots);
+    region_slots = xrealloc(NULL, nslots * sizeof(int));
+    for (size_t i = 0; i < nslots; ++i) region_slots[i] = -1;
+    n_region_slots = nslots;
+    for (size_t id = 0; id < n_regions; ++id) {
+        size_t i = hash_str(region_names[id]) & (nslots - 1);
+        while (region_slots[i] >= 0) i = (i + 1) & (nslots - 1);
+        region_slots[i] = (int)id;
+    }
+}
+
+static int region_id(const char *name) {
+    if (n_region_slots == 0) region_rehash(1024);
+
+    size_t i = hash_str(name) & (n_region_slots - 1);
+    while (region_slots[i] >= 0) {
+        if (strcmp(region_names[region_slots[i]], name) == 0) return region_slots[i];
+        i = (i + 1) & (n_region_slots - 1);
+    }
+
+    if (n_regions == cap_regions) {
+        cap_regions = cap_regions ? 2 * cap_regions : 256;
+        region_names = xrealloc(region_names, cap_regions * sizeof(char *));
+    }
+    region_names[n_regions] = xstrdup(name);
+    region_slots[i] = (int)n_regions;
+    n_regions++;
+
+    if (2 * n_regions > n_region_slots) region_rehash(2 * n_region_slots);
+    return (int)n_regions - 1;
+}
+
+/* -------------------------
+   Lecture CSV
+   ------------------------- */
+
+/* Lit une ligne complète quelle que soit sa longueur (sans le \n final) */
+static char *read_line(FILE *f, char **buf, size_t *cap) {
+    size_t len = 0;
+    if (*cap == 0) { *cap = 4096; *buf = xrealloc(NULL, *cap); }
+    for (;;) {
+        if (!fgets(*buf + len, (int)(*cap - len), f)) {
+            if (len == 0) return NULL;
+            break;
+        }
+        len += strlen(*buf + len);
+        if (len > 0 && (*buf)[len - 1] == '\n') break;
+        if (len + 1 == *cap) { *cap *= 2; *buf = xrealloc(*buf, *cap); }
+    }
+    while (len > 0 && ((*buf)[len-1] == '\n' || (*buf)[len-1] == '\r')) (*buf)[--len] = '\0';
+    return *buf;
+}
+
+/* Découpe une ligne en champs (sur place), guillemets CSV acceptés.
+   Retourne le nombre de champs ; *fields grandit si besoin. */
+static int split_fields(char *line, char ***fields, int *cap) {
+    int n = 0;
+    char *p = line;
+    for (;;) {
+        if (n == *cap) {
+            *cap = *cap ? 2 * *cap : 16;
+            *fields = xrealloc(*fields, (size_t)*cap * sizeof(char *));
+        }
+        if (*p == '"') {
+            char *out = ++p;
+            (*fields)[n++] = out;
+            while (*p) {
+                if (p[0] == '"' && p[1] == '"') { *out++ = '"'; p += 2; }
+                else if (*p == '"') { p++; break; }
+                else *out++ = *p++;
+            }
+            while (*p && *p != ',') p++;
+            int more = (*p == ',');
+            *out = '\0';            /* out est toujours en retard d'au moins un caractère sur p */
+            if (!more) break;
+            p++;
+        } else {
+            (*fields)[n++] = p;
+            while (*p && *p != ',') p++;
+            if (*p == '\0') break;
+            *p++ = '\0';
+        }
+    }
+    return n;
+}
+
+static void trim(char *s) {
+    size_t n = strlen(s);
+    while (n > 0 && (s[n-1] == ' ' || s[n-1] == '\t')) s[--n] = '\0';
+    size_t k = 0;
+    while (s[k] == ' ' || s[k] == '\t') k++;
+    if (k) memmove(s, s + k, n - k + 1);
+}
+
+/* Indice de la première colonne dont le nom figure dans names (liste terminée par NULL) */
+static int find_col(char **cols, int ncols, const char *const *names) {
+    for (const char *const *nm = names; *nm; ++nm)
+        for (int i = 0; i < ncols; ++i)
+            if (strcmp(cols[i], *nm) == 0) return i;
+    return -1;
+}
+
+static const char *const COL_REGION[] = { "Region", NULL };
+static const char *const COL_YEAR[]   = { "Year", NULL };
+static const char *const COL_P[]      = { "P", "NO2", "PollutionGlobale", NULL };
+static const char *const COL_R0[]     = { "r0_global", "r0", NULL };
+static const char *const COL_ALPHA[]  = { "alpha_global", "alpha", NULL };
+static const char *const COL_K[]      = { "K_estimated", "K", NULL };
+static const char *const COL_B0[]     = { "B0_estimated", "B0", NULL };
+
+static int read_scenario(Scenario *s, int model) {
+    FILE *f = fopen(s->input, "r");
+    if (!f) {
+        fprintf(stderr, "Erreur: impossible d'ouvrir %s\n", s->input);
+        return 0;
+    }
+    setvbuf(f, NULL, _IOFBF, IO_BUFFER);
+
+    char *line = NULL;
+    size_t cap = 0;
+    char **fields = NULL;
+    int fcap = 0;
+
+    if (!read_line(f, &line, &cap)) {
+        fprintf(stderr, "Erreur: fichier vide %s\n", s->input);
+        fclose(f);
+        return 0;
+    }
+
+    int ncols = split_fields(line, &fields, &fcap);
+    for (int i = 0; i < ncols; ++i) trim(fields[i]);
+
+    int iRegion = find_col(fields, ncols, COL_REGION);
+    int iYear   = find_col(fields, ncols, COL_YEAR);
+    int iP      = find_col(fields, ncols, COL_P);
+    int iR0     = find_col(fields, ncols, COL_R0);
+    int iAlpha  = find_col(fields, ncols, COL_ALPHA);
+    int iK      = find_col(fields, ncols, COL_K);
+    int iB0     = find_col(fields, ncols, COL_B0);
+
+    if (iYear < 0 || iP < 0 || iR0 < 0 || iK < 0 || iB0 < 0 ||
+        (model == MODEL_REGIONAL && iAlpha < 0)) {
+        fprintf(stderr, "Erreur: colonnes attendues manquantes dans %s\n", s->input);
+        free(line); free(fields); fclose(f);
+        return 0;
+    }
+
+    int national_id = iRegion < 0 ? region_id("") : -1;
+    long lineno = 1;
+
+    while (read_line(f, &line, &cap)) {
+        lineno++;
+        if (line[0] == '\0') continue;
+
+        int n = split_fields(line, &fields, &fcap);
+        if (n < ncols) {
+            fprintf(stderr, "Avertissement: %s ligne %ld incomplète ignorée\n", s->input, lineno);
+            continue;
+        }
+
+        if (s->n == s->cap) {
+            s->cap = s->cap ? 2 * s->cap : 1024;
+            s->rows = xrealloc(s->rows, s->cap * sizeof(Row));
+        }
+        Row *r = &s->rows[s->n++];
+        r->region = iRegion >= 0 ? region_id(fields[iRegion]) : national_id;
+        r->year   = (int)strtol(fields[iYear], NULL, 10);
+        r->P      = strtod(fields[iP], NULL);
+        r->r0     = strtod(fields[iR0], NULL);
+        r->alpha  = iAlpha >= 0 ? strtod(fields[iAlpha], NULL) : 0.0;
+        r->K      = strtod(fields[iK], NULL);
+        r->B0     = strtod(fields[iB0], NULL);
+        r->B      = NAN;
+    }
+
+    free(line);
+    free(fields);
+    fclose(f);
+    return 1;
+}
+
+/* -------------------------
+   Tri (région, année) : O(n log n) au lieu du tri par insertion
+   ------------------------- */
+static int cmp_row(const void *a, const void *b) {
+    const Row *x = a, *y = b;
+    if (x->region != y->region) return x->region < y->region ? -1 : 1;
+    return (x->year > y->year) - (x->year < y->year);
+}
+
+/* -------------------------
+   Index (région, année) -> ligne
+   ------------------------- */
+static void build_index(Scenario *s) {
+    size_t nslots = 16;
+    while (nslots < 2 * s->n) nslots *= 2;
+    s->slots = xrealloc(NULL, nslots * sizeof(int64_t));
+    s->nslots = nslots;
+    for (size_t i = 0; i < nslots; ++i) s->slots[i] = -1;
+
+    for (size_t k = 0; k < s->n; ++k) {
+        size_t i = hash_key(s->rows[k].region, s->rows[k].year) & (nslots - 1);
+        while (s->slots[i] >= 0) i = (i + 1) & (nslots - 1);
+        s->slots[i] = (int64_t)k;
+    }
+}
+
+static const Row *lookup(const Scenario *s, int region, int year) {
+    size_t i = hash_key(region, year) & (s->nslots - 1);
+    while (s->slots[i] >= 0) {
+        const Row *r = &s->rows[s->slots[i]];
+        if (r->region == region && r->year == year) return r;
+        i = (i + 1) & (s->nslots - 1);
+    }
+    return NULL;
+}
+
+/* -------------------------
+   Simulation
+   ------------------------- */
+static double clamp01(double B) {
+    if (B < 0.0) return 0.0;
+    if (B > 1.0) return 1.0;
+    return B;
+}
+
+/* Un an, r(P) = r0 * exp(-alpha * P), Euler explicite (growth_sim_30years.c) */
+static double step_regional(double B, const Row *r, int steps) {
+    double rate = r->r0 * exp(-r->alpha * r->P);
+    double dt = 1.0 / steps;
+    for (int k = 0; k < steps; ++k)
+        B = B + dt * rate * B * (1.0 - B / r->K);
+    return B;
+}
+
+/* Un an, r(P) = r0 * exp(P), solution logistique exacte (simulate_ndvi.c) */
+static double step_national(double B, const Row *r) {
+    const double eps = 1e-12;
+    if (r->K <= eps) return clamp01(B);
+    double rate = r->r0 * exp(r->P);
+    double Bsafe = (B < eps) ? eps : B;
+    return clamp01(r->K / (1.0 + (r->K / Bsafe - 1.0) * exp(-rate)));
+}
+
+static void simulate(Scenario *s, int model, int steps) {
+    double B = 0.0;
+    for (size_t k = 0; k < s->n; ++k) {
+        Row *r = &s->rows[k];
+        /* Nouvelle région : on repart de son B0 */
+        if (k == 0 || r->region != s->rows[k-1].region)
+            B = model == MODEL_NATIONAL ? clamp01(r->B0) : r->B0;
+
+        B = model == MODEL_NATIONAL ? step_national(B, r) : step_regional(B, r, steps);
+        r->B = B;
+    }
+}
+
+/* -------------------------
+   Écriture
+   ------------------------- */
+static void write_region(FILE *f, const char *name) {
+    if (strpbrk(name, ",\"\n") == NULL) { fputs(name, f); return; }
+    fputc('"', f);
+    for (const char *p = name; *p; ++p) {
+        if (*p == '"') fputc('"', f);
+        fputc(*p, f);
+    }
+    fputc('"', f);
+}
+
+static int write_scenario(const Scenario *s, int with_region) {
+    FILE *f = fopen(s->output, "w");
+    if (!f) {
+        fprintf(stderr, "Erreur: impossible de créer %s\n", s->output);
+        return 0;
+    }
+    setvbuf(f, NULL, _IOFBF, IO_BUFFER);
+
+    fputs(with_region ? "Region,Year,B_predicted\n" : "Year,B_predicted\n", f);
+    for (size_t k = 0; k < s->n; ++k) {
+        const Row *r = &s->rows[k];
+        if (with_region) { write_region(f, region_names[r->region]); fputc(',', f); }
+        fprintf(f, "%d,%.6f\n", r->year, r->B);
+    }
+    fclose(f);
+    printf("Simulation terminée pour : %s → %s\n", s->input, s->output);
+    return 1;
+}
+
+/* Jointure (région, année) de tous les scénarios : années présentes partout */
+static int write_combined(const char *path, Scenario *sc, int nsc, int with_region) {
+    FILE *f = fopen(path, "w");
+    if (!f) {
+        fprintf(stderr, "Erreur: impossible de créer la sortie %s\n", path);
+        return 0;
+    }
+    setvbuf(f, NULL, _IOFBF, IO_BUFFER);
+
+    if (with_region) fputs("Region,", f);
+    fputs("Year", f);
+    for (int j = 0; j < nsc; ++j) fprintf(f, ",P_%s,NDVI_%s", sc[j].label, sc[j].label);
+    fputc('\n', f);
+
+    const Row **match = xrealloc(NULL, (size_t)nsc * sizeof(Row *));
+    for (size_t k = 0; k < sc[0].n; ++k) {
+        const Row *r = &sc[0].rows[k];
+        int found = 1;
+        match[0] = r;
+        for (int j = 1; j < nsc && found; ++j) {
+            match[j] = lookup(&sc[j], r->region, r->year);
+            found = match[j] != NULL;
+        }
+        if (!found) continue;
+
+        if (with_region) { write_region(f, region_names[r->region]); fputc(',', f); }
+        fprintf(f, "%d", r->year);
+        for (int j = 0; j < nsc; ++j) fprintf(f, ",%.15g,%.15g", match[j]->P, match[j]->B);
+        fputc('\n', f);
+    }
+
+    free(match);
+    fclose(f);
+    printf("OK : fichier de sortie écrit -> %s\n", path);
+    return 1;
+}
+
+/* -------------------------
+   Main
+   ------------------------- */
+static void usage(const char *prog) {
+    fprintf(stderr,
+        "Usage: %s [--model regional|national] [--steps N] [--combined sortie.csv] "
+        "label=entree.csv[:sortie.csv] ...\n", prog);
+}
+
+int main(int argc, char *argv[]) {
+    int model = MODEL_REGIONAL;
+    int steps = DEFAULT_STEPS;
+    const char *combined = NULL;
+
+    Scenario *sc = NULL;
+    int nsc = 0;
+
+    for (int i = 1; i < argc; ++i) {
+        if (strcmp(argv[i], "--model") == 0 && i + 1 < argc) {
+            ++i;
+            if (strcmp(argv[i], "national") == 0) model = MODEL_NATIONAL;
+            else if (strcmp(argv[i], "regional") == 0) model = MODEL_REGIONAL;
+            else { usage(argv[0]); return 1; }
+        } else if (strcmp(argv[i], "--steps") == 0 && i + 1 < argc) {
+            steps = atoi(argv[++i]);
+            if (steps < 1) { usage(argv[0]); return 1; }
+        } else if (strcmp(argv[i], "--combined") == 0 && i + 1 < argc) {
+            combined = argv[++i];
+        } else {
+            /* label=entree.csv[:sortie.csv] */
+            char *spec = xstrdup(argv[i]);
+            char *eq = strchr(spec, '=');
+            if (!eq) { usage(argv[0]); return 1; }
+            *eq = '\0';
+            char *colon = strrchr(eq + 1, ':');
+            if (colon) *colon = '\0';
+
+            sc = xrealloc(sc, (size_t)(nsc + 1) * sizeof(Scenario));
+            memset(&sc[nsc], 0, sizeof(Scenario));
+            sc[nsc].label  = spec;
+            sc[nsc].input  = eq + 1;
+            sc[nsc].output = colon ? colon + 1 : NULL;
+            nsc++;
+        }
+    }
+
+    /* Par défaut : les trois scénarios de growth_sim_30years.c */
+    if (nsc == 0) {
+        static const char *defaults[3][3] = {
+            { "constant",      "scenario_with_params_constant_clean.csv",      "NDVI_scenario_constant.csv" },
+            { "minus1percent", "scenario_with_params_minus1percent_clean.csv", "NDVI_scenario_minus1percent.csv" },
+            { "plus1percent",  "scenario_with_params_plus1percent_clean.csv",  "NDVI_scenario_plus1percent.csv" },
+        };
+        nsc = 3;
+        sc = xrealloc(NULL, 3 * sizeof(Scenario));
+        memset(sc, 0, 3 * sizeof(Scenario));
+        for (int j = 0; j < 3; ++j) {
+            sc[j].label = defaults[j][0];
+            sc[j].input = defaults[j][1];
+            sc[j].output = defaults[j][2];
+        }
+    }
+
+    for (int j = 0; j < nsc; ++j) {
+        if (!read_scenario(&sc[j], model)) return 1;
+        qsort(sc[j].rows, sc[j].n, sizeof(Row), cmp_row);
+        simulate(&sc[j], model, steps);
+    }
+
+    /* Colonne Region en sortie dès qu'une vraie région est présente */
+    int with_region = n_regions > 1 || (n_regions == 1 && region_names[0][0] != '\0');
+
+    for (int j = 0; j < nsc; ++j)
+        if (sc[j].output && !write_scenario(&sc[j], with_region)) return 1;
+
+    if (combined) {
+        for (int j = 1; j < nsc; ++j) build_index(&sc[j]);
+        if (!write_combined(combined, sc, nsc, with_region)) return 1;
+    }
+
+    for (int j = 0; j < nsc; ++j) { free(sc[j].rows); free(sc[j].slots); }
+    free(sc);
+    for (size_t i = 0; i < n_regions; ++i) free(region_names[i]);
+    free(region_names);
+    free(region_slots);
+    return 0;
+}
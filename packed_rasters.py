@@ -0,0 +1,227 @@
+import os
+import sys
+import glob
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+import rasterio
+from affine import Affine
+from rasterio.features import rasterize
+
+from geometry_store import load_regions
+from checkpoint import atomic_write
+
+# -------------------------
+# SETTINGS
+# -------------------------
+# CMT_PACKED=1 makes the pipeline scripts reduce packed vectors instead of full rasters
+PACKED = os.environ.get("CMT_PACKED", "0") == "1"
+
+data_folder = "data"
+packed_folder = os.path.join("data", "cache", "packed")
+
+# Already opened grids, keyed by folder
+_memory = {}
+
+
+# -------------------------
+# PACKED GRID
+# -------------------------
+def grid_key(src):
+    """Same CRS, transform and shape -> same key, i.e. the same packed index."""
+    text = f"v2|{src.crs.to_wkt() if src.crs else ''}|{tuple(src.transform)}|{src.height}x{src.width}"
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def raster_vector(src):
+    """Band 1 as a flat float vector (nodata -> NaN) plus the flat positions of its valid cells."""
+    arr = src.read(1, masked=True)
+    dtype = arr.dtype if np.issubdtype(arr.dtype, np.floating) else np.float64
+    values = arr.astype(dtype).filled(np.nan).ravel()
+    return values, np.flatnonzero(~np.ma.getmaskarray(arr).ravel())
+
+
+class PackedGrid:
+    """
+    The valid cells of every raster sharing one grid.
+    index.npz holds the flat positions of the cells valid in at least one raster;
+    each raster is then a dense vector over those positions only (<name>.g<gen>.npy,
+    NaN where that raster has nodata). Rasters dominated by nodata shrink in proportion.
+    The district of each cell (districts.g<gen>.npz) is only built when a regional
+    reduction asks for it, so national reductions never need the boundaries.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        with np.load(os.path.join(folder, "index.npz"), allow_pickle=False) as f:
+            self.flat = f["flat"]
+            self.shape = tuple(int(n) for n in f["shape"])
+            self.transform = Affine(*f["transform"])
+            self.crs = str(f["crs"]) or None
+            self.gen = int(f["gen"])
+        self._vectors = {}
+        self._districts = None
+
+    @property
+    def n_valid(self):
+        return len(self.flat)
+
+    def keys(self):
+        suffix = f".g{self.gen}.npy"
+        return sorted(n[:-len(suffix)] for n in os.listdir(self.folder) if n.endswith(suffix))
+
+    def _path(self, key, gen=None):
+        return os.path.join(self.folder, f"{key}.g{self.gen if gen is None else gen}.npy")
+
+    def values(self, key):
+        """Packed vector of one raster (memory-mapped, read-only)."""
+        if key not in self._vectors:
+            self._vectors[key] = np.load(self._path(key), mmap_mode="r")
+        return self._vectors[key]
+
+    def fresh(self, key, raster_path):
+        path = self._path(key)
+        return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(raster_path)
+
+    def districts(self):
+        """
+        District row of every packed cell (-1 outside every district) and the row labels,
+        taken at the cell centre as rasterio.mask does.
+        """
+        if self._districts is None:
+            path = os.path.join(self.folder, f"districts.g{self.gen}.npz")
+            if not os.path.exists(path):
+                regions = load_regions(crs=self.crs)
+                district = rasterize(
+                    ((geom, i) for i, geom in enumerate(regions.geometry)),
+                    out_shape=self.shape, transform=self.transform, fill=-1, dtype="int32",
+                ).ravel()
+                atomic_write(path, lambda tmp: np.savez(tmp, region=district[self.flat],
+                                                        labels=regions.index.to_numpy()), suffix=".npz")
+            with np.load(path, allow_pickle=False) as f:
+                self._districts = (f["region"], f["labels"])
+        return self._districts
+
+    # ---- reductions on the packed vectors
+    def national_mean(self, key):
+        v = self.values(key)
+        ok = ~np.isnan(v)
+        if not ok.any():
+            return np.nan
+        return float(v[ok].sum(dtype=np.float64) / ok.sum())
+
+    def regional_means(self, key):
+        """Mean of the valid cells whose centre lies in each district, by district row label."""
+        region, labels = self.districts()
+        v = self.values(key)
+        ok = ~np.isnan(v) & (region >= 0)
+        total = np.bincount(region[ok], weights=v[ok], minlength=len(labels))
+        count = np.bincount(region[ok], minlength=len(labels))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(total / count, index=labels)
+
+    def unpack(self, vector, fill=np.nan, dtype=None):
+        """Back to a full 2-D grid (e.g. to write a GeoTIFF of a per-pixel result)."""
+        dtype = dtype or np.result_type(vector, np.float32)
+        out = np.full(self.shape[0] * self.shape[1], fill, dtype=dtype)
+        out[self.flat] = vector
+        return out.reshape(self.shape)
+
+
+def _write_npy(path, array):
+    atomic_write(path, lambda tmp: np.save(tmp, array), suffix=".npy")
+
+
+def _write_index(folder, src, flat, gen):
+    atomic_write(os.path.join(folder, "index.npz"),
+                 lambda tmp: np.savez(tmp, flat=flat, shape=np.array([src.height, src.width]),
+                                      transform=np.array(tuple(src.transform)[:6]),
+                                      crs=np.array(src.crs.to_wkt() if src.crs else ""), gen=gen),
+                 suffix=".npz")
+
+
+def _remove_generation(folder, gen):
+    for name in os.listdir(folder):
+        if f".g{gen}." in name:
+            os.remove(os.path.join(folder, name))
+
+
+def open_packed(raster_path):
+    """
+    Packed grid of a raster and the key of its vector, packing it on first use.
+    A raster valid where the index is not extends the index into a new generation:
+    every stored vector is rewritten for it (with NaN on the new cells, exact since
+    those cells were nodata for them) before index.npz switches over, so a crash
+    at any point leaves a consistent generation behind.
+    """
+    key = os.path.splitext(os.path.basename(raster_path))[0]
+    with rasterio.open(raster_path) as src:
+        folder = os.path.join(packed_folder, grid_key(src))
+        grid = _memory.get(folder)
+        if grid is None and os.path.exists(os.path.join(folder, "index.npz")):
+            grid = _memory[folder] = PackedGrid(folder)
+        if grid is not None and grid.fresh(key, raster_path):
+            return grid, key
+
+        values, valid = raster_vector(src)
+        os.makedirs(folder, exist_ok=True)
+
+        if grid is None or not np.isin(valid, grid.flat, assume_unique=True).all():
+            old = grid
+            gen = 0 if old is None else old.gen + 1
+            flat = valid if old is None else np.union1d(old.flat, valid)
+            if old is not None:
+                pos = np.searchsorted(flat, old.flat)
+                for k in old.keys():
+                    if k == key:
+                        continue
+                    grown = np.full(len(flat), np.nan, dtype=old.values(k).dtype)
+                    grown[pos] = old.values(k)
+                    _write_npy(old._path(k, gen), grown)
+            _write_npy(os.path.join(folder, f"{key}.g{gen}.npy"), values[flat])
+            _write_index(folder, src, flat, gen)
+            if old is not None:
+                old._vectors.clear()
+                _remove_generation(folder, old.gen)
+            grid = _memory[folder] = PackedGrid(folder)
+            return grid, key
+
+        grid._vectors.pop(key, None)
+        _write_npy(grid._path(key), values[grid.flat])
+    return grid, key
+
+
+def pack_rasters(paths):
+    """Pack every raster of `paths`; returns {path: (grid, key)}."""
+    return {path: open_packed(path) for path in paths}
+
+
+def packed_stack(paths):
+    """
+    (grid, matrix) with one column per raster over the grid's packed cells.
+    All rasters must be on the same grid; packing one may extend the index, so
+    the columns are read once every raster is packed.
+    """
+    packed = pack_rasters(paths)
+    folders = {grid.folder for grid, _ in packed.values()}
+    if len(folders) > 1:
+        raise ValueError("rasters are not all on the same grid")
+    grid = _memory[folders.pop()]
+    return grid, np.column_stack([grid.values(key) for _, key in packed.values()])
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(data_folder, "*.tif")))
+
+    start = time.perf_counter()
+    packed = pack_rasters(paths)
+    print(f"{len(paths)} rasters packed in {time.perf_counter() - start:.1f} s")
+
+    for path, (grid, key) in packed.items():
+        cells = grid.shape[0] * grid.shape[1]
+        start = time.perf_counter()
+        mean = grid.national_mean(key)
+        elapsed = time.perf_counter() - start
+        print(f"{key}: {grid.n_valid}/{cells} cells kept ({grid.n_valid / cells:.0%}), "
+              f"mean {mean:.6g} in {elapsed * 1000:.2f} ms")
@@ -0,0 +1,217 @@
+import os
+import re
+import sys
+import glob
+import time
+import numpy as np
+import rasterio
+
+from pixel_simulation import chunk_windows, output_profile, CHUNK
+from packed_rasters import PACKED, packed_stack
+
+# -------------------------
+# FILE SETTINGS
+# -------------------------
+# Pattern matching files like NDVI_2010.tif ... NDVI_2018.tif
+ndvi_files = sorted(glob.glob("NDVI_*.tif"))
+year_pattern = re.compile(r".*_(\d{4})\.tif$")
+out_folder = os.path.join("Results", "pixel_parameters")
+
+# Same bounds and starting point as the regional curve_fit in main.py
+LOWER = np.array([0.0001, 0.1, 1e-6])    # r, K, B0 (B0 > 0 keeps K/B0 finite)
+UPPER = np.array([2.0, 2.0, 2.0])
+R_GUESS = 0.1
+MIN_POINTS = 4
+
+MAX_ITER = 100
+TOL = 1e-10
+
+
+# -------------------------
+# BATCHED LEVENBERG-MARQUARDT
+# -------------------------
+def _model_and_jacobian(theta, t):
+    """Logistic values and analytic Jacobian for N pixels at T times."""
+    r, K, B0 = theta[:, 0:1], theta[:, 1:2], theta[:, 2:3]
+    E = np.exp(-r * t)
+    c = K / B0 - 1.0
+    D = 1.0 + c * E
+    f = K / D
+
+    J = np.empty(f.shape + (3,))
+    J[..., 0] = K * c * t * E / D**2             # df/dr
+    J[..., 1] = (1.0 - E) / D**2                  # df/dK
+    J[..., 2] = K**2 * E / (B0**2 * D**2)         # df/dB0
+    return f, J
+
+
+def fit_logistic_batch(t, B, max_iter=MAX_ITER, tol=TOL):
+    """
+    Fit (r, K, B0) of the logistic curve to N series at once.
+    t is (T,), B is (N, T) with NaN for missing years.
+    Every pixel has its own damping factor; each iteration solves N 3x3 systems in one call.
+    Returns theta (N, 3), converged (N,) and the final sum of squared residuals.
+    """
+    m = np.isfinite(B)
+    y = np.where(m, B, 0.0)
+    n_obs = m.sum(axis=1)
+    N = len(B)
+
+    # Initial guesses: first valid value, max + 0.1, r = 0.1
+    first = np.argmax(m, axis=1)
+    theta = np.column_stack([
+        np.full(N, R_GUESS),
+        np.nanmax(np.where(m, B, np.nan), axis=1) + 0.1,
+        y[np.arange(N), first],
+    ])
+    theta = np.clip(np.nan_to_num(theta, nan=0.5), LOWER, UPPER)
+
+    f, J = _model_and_jacobian(theta, t)
+    res = (f - y) * m
+    cost = (res**2).sum(axis=1)
+    lam = np.full(N, 1e-3)
+    active = n_obs >= MIN_POINTS
+    converged = np.zeros(N, dtype=bool)
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+
+        Ja = J[idx] * m[idx, :, None]
+        JtJ = np.einsum("nti,ntj->nij", Ja, Ja)
+        Jtr = np.einsum("nti,nt->ni", Ja, res[idx])
+        A = JtJ + lam[idx, None, None] * (np.eye(3) * (JtJ.diagonal(axis1=1, axis2=2)[:, :, None] + 1e-12))
+
+        try:
+            step = np.linalg.solve(A, -Jtr[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # A degenerate pixel (e.g. flat series) in the batch: pseudo-inverse for all
+            step = -(np.linalg.pinv(A) @ Jtr[..., None])[..., 0]
+
+        trial = np.clip(theta[idx] + step, LOWER, UPPER)
+        f_new, J_new = _model_and_jacobian(trial, t)
+        res_new = (f_new - y[idx]) * m[idx]
+        cost_new = (res_new**2).sum(axis=1)
+
+        better = cost_new < cost[idx]
+        ok = idx[better]
+        theta[ok], f[ok], J[ok], res[ok] = trial[better], f_new[better], J_new[better], res_new[better]
+
+        # Converged when the accepted decrease (or the step) becomes negligible
+        decrease = cost[idx] - np.where(better, cost_new, cost[idx])
+        small_step = np.abs(trial - theta[idx]).max(axis=1) < 1e-9
+        done = (better & (decrease <= tol * (1.0 + cost[idx]))) | (~better & small_step) | (cost_new < 1e-14)
+
+        cost[ok] = cost_new[better]
+        lam[idx] = np.where(better, lam[idx] / 10.0, lam[idx] * 10.0)
+        done |= lam[idx] > 1e10
+
+        converged[idx[done & (lam[idx] <= 1e10)]] = True
+        active[idx[done]] = False
+
+    theta[n_obs < MIN_POINTS] = np.nan
+    return theta, converged, cost
+
+
+# -------------------------
+# RASTER STACK
+# -------------------------
+def fit_packed_stack(paths=ndvi_files, out_folder=out_folder):
+    """Same as fit_raster_stack, on the packed valid cells of the stack instead of raster windows."""
+    years = np.array([int(year_pattern.match(p).group(1)) for p in paths])
+    t = (years - years.min()).astype(float)
+    grid, stack = packed_stack(paths)
+
+    planes = np.full((3, grid.n_valid), np.nan, dtype=np.float32)
+    conv = np.full(grid.n_valid, 255, dtype=np.uint8)
+    n_fit = n_conv = 0
+    # Blocks of as many cells as one window, to bound the solver's memory
+    for start in range(0, grid.n_valid, CHUNK * CHUNK):
+        block = np.asarray(stack[start:start + CHUNK * CHUNK], dtype=float)
+        valid = np.isfinite(block).sum(axis=1) >= MIN_POINTS
+        if not valid.any():
+            continue
+        theta, converged, _ = fit_logistic_batch(t, block[valid])
+        idx = start + np.flatnonzero(valid)
+        planes[:, idx] = theta.T
+        conv[idx] = converged
+        n_fit += int(valid.sum())
+        n_conv += int(converged.sum())
+
+    os.makedirs(out_folder, exist_ok=True)
+    with rasterio.open(paths[0]) as ref:
+        profile = output_profile(ref)
+    for name, plane in zip(["r", "K", "B0"], planes):
+        with rasterio.open(os.path.join(out_folder, f"{name}.tif"), "w", **profile) as dst:
+            dst.write(grid.unpack(plane), 1)
+    with rasterio.open(os.path.join(out_folder, "converged.tif"), "w",
+                       **dict(profile, dtype="uint8", nodata=255)) as dst:
+        dst.write(grid.unpack(conv, fill=255, dtype=np.uint8), 1)
+
+    return n_fit, n_conv
+
+
+def fit_raster_stack(paths=ndvi_files, out_folder=out_folder):
+    """Fit every pixel of the NDVI stack window by window and write r/K/B0 rasters + convergence mask."""
+    if PACKED:
+        return fit_packed_stack(paths, out_folder)
+    years = np.array([int(year_pattern.match(p).group(1)) for p in paths])
+    t = (years - years.min()).astype(float)
+
+    sources = [rasterio.open(p) for p in paths]
+    ref = sources[0]
+    for src in sources[1:]:
+        if src.shape != ref.shape or src.transform != ref.transform:
+            raise ValueError(f"{src.name} is not on the grid of {ref.name}")
+
+    os.makedirs(out_folder, exist_ok=True)
+    profile = output_profile(ref)
+    mask_profile = dict(profile, dtype="uint8", nodata=255)
+
+    names = ["r", "K", "B0"]
+    outputs = [rasterio.open(os.path.join(out_folder, f"{n}.tif"), "w", **profile) for n in names]
+    conv_out = rasterio.open(os.path.join(out_folder, "converged.tif"), "w", **mask_profile)
+
+    n_fit = n_conv = 0
+    try:
+        for win in chunk_windows(ref.height, ref.width):
+            shape = (int(win.height), int(win.width))
+            stack = np.stack([
+                src.read(1, window=win, masked=True).astype(np.float32).filled(np.nan)
+                for src in sources
+            ], axis=-1).reshape(-1, len(sources))
+
+            valid = np.isfinite(stack).sum(axis=1) >= MIN_POINTS
+            planes = np.full((3, shape[0] * shape[1]), np.nan, dtype=np.float32)
+            conv = np.full(shape[0] * shape[1], 255, dtype=np.uint8)
+
+            if valid.any():
+                theta, converged, _ = fit_logistic_batch(t, stack[valid].astype(float))
+                planes[:, valid] = theta.T
+                conv[valid] = converged
+                n_fit += int(valid.sum())
+                n_conv += int(converged.sum())
+
+            for dst, plane in zip(outputs, planes):
+                dst.write(plane.reshape(shape), 1, window=win)
+            conv_out.write(conv.reshape(shape), 1, window=win)
+    finally:
+        for dst in outputs:
+            dst.close()
+        conv_out.close()
+        for src in sources:
+            src.close()
+
+    return n_fit, n_conv
+
+
+if __name__ == "__main__":
+    paths = sorted(sys.argv[1:]) or ndvi_files
+    if not paths:
+        raise SystemExit("No NDVI_*.tif files found")
+
+    start = time.perf_counter()
+    n_fit, n_conv = fit_raster_stack(paths)
+    print(f"{n_fit} pixels fitted ({n_conv / max(n_fit, 1):.1%} converged) in {time.perf_counter() - start:.1f} s")
+    print(f"Parameter rasters written to {out_folder}/")
@@ -0,0 +1,202 @@
+import os
+import sys
+import time
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.features import rasterize
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window, bounds as window_bounds, transform as window_transform
+
+from logistic_model import growth_rate, logistic_step, load_region_parameters, scenarios
+from region_index import RegionIndex
+from geometry_store import load_regions
+from packed_rasters import PACKED, grid_key, packed_stack
+
+# -------------------------
+# SETTINGS
+# -------------------------
+ndvi_path = "NDVI_2018.tif"                          # last observed NDVI -> B0 of every pixel
+pollution_path = os.path.join("data", "NO2_2018.tif")  # or a pollution-index raster
+params_path = "fitted_parameters.csv"
+out_folder = os.path.join("Results", "pixel_ndvi")
+
+END_YEAR = 2050
+CHUNK = 512     # pixels per window side: memory is O(CHUNK^2), not O(raster)
+
+
+# -------------------------
+# INPUTS ON THE NDVI GRID
+# -------------------------
+def chunk_windows(height, width, size=CHUNK):
+    for row in range(0, height, size):
+        for col in range(0, width, size):
+            yield Window(col, row, min(size, width - col), min(size, height - row))
+
+
+def district_K_window(index, K_by_region, win, transform, shape):
+    """Rasterize the district carrying capacities over one window only."""
+    xmin, ymin, xmax, ymax = window_bounds(win, transform)
+    _, hits = index.intersect_bboxes([xmin], [ymin], [xmax], [ymax])
+    shapes = [
+        (index.geoms[i], K_by_region[index.names[i]])
+        for i in hits if index.names[i] in K_by_region
+    ]
+    if not shapes:
+        return np.full(shape, np.nan, dtype=np.float32)
+    return rasterize(
+        shapes, out_shape=shape, transform=window_transform(win, transform),
+        fill=np.nan, dtype="float32",
+    )
+
+
+def output_profile(src):
+    profile = src.profile.copy()
+    profile.update(
+        driver="GTiff", count=1, dtype="float32", nodata=np.nan,
+        tiled=True, blockxsize=256, blockysize=256, compress="deflate", BIGTIFF="IF_SAFER",
+    )
+    return profile
+
+
+# -------------------------
+# SIMULATION
+# -------------------------
+def same_grid(paths):
+    keys = set()
+    for path in paths:
+        with rasterio.open(path) as src:
+            keys.add(grid_key(src))
+    return len(keys) == 1
+
+
+def simulate_packed(ndvi_path, pollution_path, params, k_path, years, scenarios, out_folder,
+                    steps_per_year=None):
+    """simulate_pixels on the packed valid cells, for inputs already on one grid."""
+    grid, stack = packed_stack([ndvi_path, pollution_path] + ([k_path] if k_path else []))
+    b0 = np.asarray(stack[:, 0], dtype=float)
+    p0 = np.asarray(stack[:, 1], dtype=float)
+    if k_path:
+        k = np.asarray(stack[:, 2], dtype=float)
+    else:
+        region, labels = grid.districts()
+        names = load_regions(crs=grid.crs).loc[labels, "NAME"]
+        K_by_row = names.map(params["K_estimated"]).to_numpy(dtype=float)
+        k = np.where(region >= 0, K_by_row[np.maximum(region, 0)], np.nan)
+
+    valid = np.isfinite(b0) & np.isfinite(p0) & np.isfinite(k) & (b0 > 0) & (k > 0)
+    b0, p0, k = b0[valid], p0[valid], k[valid]
+    r0 = float(params["r0_global"].iloc[0])
+    alpha = float(params["alpha_global"].iloc[0])
+
+    with rasterio.open(ndvi_path) as ref:
+        profile = output_profile(ref)
+    out = np.full(grid.n_valid, np.nan, dtype=np.float32)
+    for name, rate in scenarios.items():
+        os.makedirs(os.path.join(out_folder, name), exist_ok=True)
+        B = b0
+        for i, y in enumerate(years):
+            P = p0 * (1.0 + rate) ** (i + 1)
+            B = logistic_step(B, k, growth_rate(r0, alpha, P), steps_per_year)
+            out[valid] = B
+            with rasterio.open(os.path.join(out_folder, name, f"NDVI_{y}.tif"), "w", **profile) as dst:
+                dst.write(grid.unpack(out), 1)
+    return years
+
+
+def simulate_pixels(ndvi_path=ndvi_path, pollution_path=pollution_path, params_path=params_path,
+                    k_path=None, end_year=END_YEAR, scenarios=scenarios, out_folder=out_folder,
+                    steps_per_year=None):
+    """
+    Run the logistic model on every valid NDVI pixel, driven by the co-located
+    pollution pixel, and write one future-NDVI GeoTIFF per scenario and year.
+    Windows are read, simulated for all years and written before the next one,
+    so memory stays bounded whatever the raster size. With CMT_PACKED=1 and all
+    inputs on the NDVI grid, the packed valid cells are simulated instead.
+    K comes from k_path (per-pixel raster) or else from the district K_estimated.
+    """
+    params = load_region_parameters(params_path)
+    r0 = float(params["r0_global"].iloc[0])
+    alpha = float(params["alpha_global"].iloc[0])
+    first_year = int(params["last_year"].max()) + 1
+    years = list(range(first_year, end_year + 1))
+
+    inputs = [ndvi_path, pollution_path] + ([k_path] if k_path else [])
+    if PACKED and same_grid(inputs):
+        return simulate_packed(ndvi_path, pollution_path, params, k_path, years, scenarios,
+                               out_folder, steps_per_year)
+
+    with rasterio.open(ndvi_path) as ndvi_src, rasterio.open(pollution_path) as poll_src:
+        grid = dict(crs=ndvi_src.crs, transform=ndvi_src.transform,
+                    width=ndvi_src.width, height=ndvi_src.height)
+
+        # Pollution resampled on the fly onto the NDVI grid, window by window
+        poll = WarpedVRT(poll_src, resampling=Resampling.bilinear, **grid)
+        k_file = k_src = None
+        if k_path is not None:
+            k_file = rasterio.open(k_path)
+            k_src = WarpedVRT(k_file, resampling=Resampling.bilinear, **grid)
+            index = K_by_region = None
+        else:
+            index = RegionIndex.from_shapefile(crs=ndvi_src.crs)
+            K_by_region = params["K_estimated"].to_dict()
+
+        profile = output_profile(ndvi_src)
+        outputs = {}
+        for name in scenarios:
+            os.makedirs(os.path.join(out_folder, name), exist_ok=True)
+            outputs[name] = [
+                rasterio.open(os.path.join(out_folder, name, f"NDVI_{y}.tif"), "w", **profile)
+                for y in years
+            ]
+
+        try:
+            for win in chunk_windows(ndvi_src.height, ndvi_src.width):
+                shape = (int(win.height), int(win.width))
+                B0 = ndvi_src.read(1, window=win, masked=True).astype(np.float32).filled(np.nan)
+                P0 = poll.read(1, window=win, masked=True).astype(np.float32).filled(np.nan)
+                if k_src is not None:
+                    K = k_src.read(1, window=win, masked=True).astype(np.float32).filled(np.nan)
+                else:
+                    K = district_K_window(index, K_by_region, win, ndvi_src.transform, shape)
+
+                valid = np.isfinite(B0) & np.isfinite(P0) & np.isfinite(K) & (B0 > 0) & (K > 0)
+                if not valid.any():
+                    for name in scenarios:
+                        for dst in outputs[name]:
+                            dst.write(np.full(shape, np.nan, dtype=np.float32), 1, window=win)
+                    continue
+
+                # Compact vectors of the valid pixels only
+                b0, p0, k = B0[valid].astype(float), P0[valid].astype(float), K[valid].astype(float)
+                out = np.full(shape, np.nan, dtype=np.float32)
+
+                for name, rate in scenarios.items():
+                    B = b0
+                    for i, dst in enumerate(outputs[name]):
+                        P = p0 * (1.0 + rate) ** (i + 1)
+                        B = logistic_step(B, k, growth_rate(r0, alpha, P), steps_per_year)
+                        out[valid] = B
+                        dst.write(out, 1, window=win)
+        finally:
+            for name in outputs:
+                for dst in outputs[name]:
+                    dst.close()
+            poll.close()
+            if k_src is not None:
+                k_src.close()
+                k_file.close()
+
+    return years
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    ndvi = args[0] if len(args) > 0 else ndvi_path
+    pollution = args[1] if len(args) > 1 else pollution_path
+    k_raster = args[2] if len(args) > 2 else None
+
+    start = time.perf_counter()
+    years = simulate_pixels(ndvi, pollution, k_path=k_raster)
+    print(f"Pixel NDVI {years[0]}-{years[-1]} for {len(scenarios)} scenarios written to {out_folder}/ "
+          f"in {time.perf_counter() - start:.1f} s")
@@ -1,23 +1,16 @@
 import pandas as pd
 
+from pollution_index import load_weights, regional_pollution_index
+
 # Charger les données de pollution
 df = pd.read_csv("Switzerland_pollution_timeseries_COMPLETE.csv")
 
 # Charger les poids globaux
-poids = pd.read_csv("poids_globaux.csv", index_col=0)["Poids"]
-
-# Calculer la pollution globale pour chaque ligne
-df["PollutionGlobale"] = (
-    df["O3"] * poids["O3"] +
-    df["NO2"] * poids["NO2"] +
-    df["PM10"] * poids["PM10"] +
-    df["CO2"] * poids["CO2"] +
-    df["CH4"] * poids["CH4"] +
-    df["SO2"] * poids["SO2"]
-)
+poids = load_weights("poids_globaux.csv")
 
-# Agréger par année (somme ou moyenne selon ton besoin)
-polution_each_Year = df.groupby("Year")["PollutionGlobale"].mean().reset_index()
+# Calculer la pollution globale pour chaque année
+# (contraction année x polluant par les poids, pour tous les polluants de poids_globaux.csv)
+polution_each_Year = regional_pollution_index(df, poids)[["Year", "PollutionGlobale"]]
 
 # Sauvegarder dans un CSV
 polution_each_Year.to_csv("pollution_each_year.csv", index=False)
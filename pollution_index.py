@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# SETTINGS
+# -------------------------
+weights_path = "poids_globaux.csv"
+NATIONAL = "Switzerland"
+
+
+# -------------------------
+# CUBE: region x year x pollutant
+# -------------------------
+def build_cube(df, pollutants, region_col="Region", year_col="Year"):
+    """
+    Stack a wide table (one column per pollutant) into a (region, year, pollutant) array.
+    Without a region column the table is treated as the national series.
+    Missing (region, year) combinations are NaN.
+    """
+    df = df.rename(columns={"S02": "SO2"})
+    if region_col not in df.columns:
+        df = df.assign(**{region_col: NATIONAL})
+
+    regions = np.sort(df[region_col].unique())
+    years = np.sort(df[year_col].unique())
+    r_idx = np.searchsorted(regions, df[region_col].values)
+    y_idx = np.searchsorted(years, df[year_col].values)
+
+    cube = np.full((len(regions), len(years), len(pollutants)), np.nan)
+    cube[r_idx, y_idx, :] = df[list(pollutants)].to_numpy(dtype=float)
+    return cube, regions, years
+
+
+def cube_from_long(df, region_col="Region", year_col="Year", pollutant_col="Pollutant", value_col="Mean_Value"):
+    """Same as build_cube() for the long (Year, Pollutant, Mean_Value) layout used in data.py."""
+    index = [c for c in (region_col, year_col) if c in df.columns]
+    wide = df.pivot_table(index=index, columns=pollutant_col, values=value_col).reset_index()
+    pollutants = [c for c in wide.columns if c not in index]
+    cube, regions, years = build_cube(wide, pollutants, region_col, year_col)
+    return cube, regions, years, pollutants
+
+
+# -------------------------
+# WEIGHTS
+# -------------------------
+def load_weights(path=weights_path):
+    """Global weights (Series indexed by pollutant)."""
+    poids = pd.read_csv(path, index_col=0)["Poids"]
+    return poids.rename(index={"S02": "SO2"})
+
+
+def align_weights(weights, pollutants, regions=None):
+    """
+    Weight array matching the cube axes:
+    a Series gives a (pollutant,) vector, a region x pollutant DataFrame gives a (region, pollutant) matrix.
+    """
+    if isinstance(weights, pd.DataFrame):
+        w = weights.reindex(index=regions, columns=list(pollutants))
+    else:
+        w = pd.Series(weights).reindex(list(pollutants))
+    if w.isna().any(axis=None):
+        raise ValueError(f"Missing weights for some pollutants/regions: {list(pollutants)}")
+    return w.to_numpy(dtype=float)
+
+
+# -------------------------
+# INDEX
+# -------------------------
+def pollution_index(cube, w):
+    """
+    Contract the pollutant axis in one operation:
+    global weights (P,)   -> index[r, y] = sum_p cube[r, y, p] * w[p]
+    regional weights (R, P) -> index[r, y] = sum_p cube[r, y, p] * w[r, p]
+    """
+    if w.ndim == 1:
+        return cube @ w
+    return np.einsum("ryp,rp->ry", cube, w)
+
+
+def index_frame(index, regions, years, name="PollutionGlobale"):
+    """Long (Region, Year, index) table from a (region, year) array."""
+    return pd.DataFrame({
+        "Region": np.repeat(regions, len(years)),
+        "Year": np.tile(years, len(regions)),
+        name: index.ravel(),
+    })
+
+
+def regional_pollution_index(df, weights, region_col="Region", year_col="Year"):
+    """Index for every region and year of a wide table, with global or per-region weights."""
+    pollutants = list(weights.columns if isinstance(weights, pd.DataFrame) else weights.index)
+    cube, regions, years = build_cube(df, pollutants, region_col, year_col)
+    w = align_weights(weights, pollutants, regions)
+    return index_frame(pollution_index(cube, w), regions, years)
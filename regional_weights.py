@@ -0,0 +1,129 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from pollution_index import build_cube
+from rollups import regional_path, regional_table, load_district_stats
+
+# -------------------------
+# SETTINGS
+# -------------------------
+input_path = regional_path   # Region, Year, one column per pollutant, Mean_NDVI (written by rollups.py)
+output_path = "poids_regionaux.csv"
+polluants = ["O3", "NO2", "PM10", "CO2", "CH4", "SO2"]
+ndvi_col = "Mean_NDVI"
+
+# Ridge strengths of the regularization path (on standardized pollutants)
+lambdas = np.logspace(-4, 3, 30)
+
+
+# -------------------------
+# BATCHED LEAST SQUARES
+# -------------------------
+def _center(X, y, standardize):
+    """Per-region masked centering (and scaling) of the stacked problems."""
+    m = np.isfinite(X).all(axis=2) & np.isfinite(y)
+    n = m.sum(axis=1)
+    w = m / np.maximum(n, 1)[:, None]
+
+    X0 = np.where(m[..., None], X, 0.0)
+    y0 = np.where(m, y, 0.0)
+    x_mean = np.einsum("ry,ryp->rp", w, X0)
+    y_mean = np.einsum("ry,ry->r", w, y0)
+
+    Xc = (X0 - x_mean[:, None, :]) * m[..., None]
+    yc = (y0 - y_mean[:, None]) * m
+
+    if standardize:
+        scale = np.sqrt(np.einsum("ry,ryp->rp", w, Xc**2))
+        scale[scale == 0] = 1.0
+    else:
+        scale = np.ones_like(x_mean)
+
+    return Xc / scale[:, None, :], yc, x_mean, y_mean, scale, n
+
+
+def ridge_path(X, y, lambdas, standardize=True):
+    """
+    Fit every region's weight vector for every ridge strength at once.
+    X is (region, year, pollutant), y is (region, year); rows with NaN are ignored.
+    One batched SVD of the centered design gives the whole path:
+        w(lambda) = V diag(s / (s^2 + lambda)) U^T y
+    lambda = 0 gives the minimum-norm least-squares solution.
+    Returns coef (region, lambda, pollutant), intercept (region, lambda) and GCV (region, lambda).
+    """
+    lambdas = np.atleast_1d(np.asarray(lambdas, dtype=float))
+    Xc, yc, x_mean, y_mean, scale, n = _center(X, y, standardize)
+
+    U, s, Vt = np.linalg.svd(Xc, full_matrices=False)        # (R,Y,k) (R,k) (R,k,P)
+    Uty = np.einsum("ryk,ry->rk", U, yc)
+
+    s2 = s[:, None, :] ** 2
+    lam = lambdas[None, :, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d = np.where(s2 + lam > 0, s[:, None, :] / (s2 + lam), 0.0)
+    # Numerically null directions do not carry information
+    d = np.where(s[:, None, :] > 1e-10 * s.max(axis=1, keepdims=True)[..., None], d, 0.0)
+
+    coef = np.einsum("rkp,rlk,rk->rlp", Vt, d, Uty) / scale[:, None, :]
+    intercept = y_mean[:, None] - np.einsum("rlp,rp->rl", coef, x_mean)
+
+    # Generalized cross-validation, to pick lambda per region
+    fitted = np.einsum("ryk,rlk,rk->rly", U, d * s[:, None, :], Uty)
+    rss = ((yc[:, None, :] - fitted) ** 2).sum(axis=2)
+    dof = (d * s[:, None, :]).sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gcv = n[:, None] * rss / (n[:, None] - dof) ** 2
+
+    return coef, intercept, gcv
+
+
+def fit_regional_weights(df, pollutants=polluants, target=ndvi_col, lam=None, standardize=True):
+    """
+    Region x pollutant weight table.
+    lam=None picks the ridge strength of each region by GCV over `lambdas`,
+    lam=0 is plain least squares, any other value is a fixed ridge penalty.
+    """
+    cube, regions, years = build_cube(df, list(pollutants) + [target])
+    X, y = cube[..., :-1], cube[..., -1]
+
+    path = lambdas if lam is None else [lam]
+    coef, intercept, gcv = ridge_path(X, y, path, standardize)
+
+    if lam is None:
+        best = np.nanargmin(np.where(np.isfinite(gcv), gcv, np.inf), axis=1)
+    else:
+        best = np.zeros(len(regions), dtype=int)
+    rows = np.arange(len(regions))
+
+    weights = pd.DataFrame(coef[rows, best], index=pd.Index(regions, name="Region"), columns=list(pollutants))
+    extra = pd.DataFrame({
+        "Intercept": intercept[rows, best],
+        "Lambda": np.asarray(path, dtype=float)[best],
+    }, index=weights.index)
+    return weights, extra
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else input_path
+    if os.path.exists(path):
+        df = pd.read_csv(path)
+    else:
+        # Built from the district statistics of rollups.py (python rollups.py first)
+        stats = load_district_stats()
+        if stats is None:
+            raise SystemExit(f"{path} not found: run python rollups.py to build it from the rasters")
+        df = regional_table(stats)
+        df.to_csv(path, index=False)
+        print(f"{path} built from the district statistics")
+    df = df.rename(columns={"S02": "SO2"})
+    pollutants = [p for p in polluants if p in df.columns]
+
+    weights, extra = fit_regional_weights(df, pollutants)
+
+    # Same layout as poids_globaux.csv, one row per region
+    weights.to_csv(output_path)
+    print(f"Poids régionaux calculés pour {len(weights)} régions et sauvegardés dans '{output_path}'")
+    print(weights.describe().T[["mean", "std", "min", "max"]])
+    print(f"Lambda médian (GCV) : {extra['Lambda'].median():.4g}")
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import pandas as pd
+
+# -------------------------
+# SETTINGS
+# -------------------------
+store_path = os.path.join("Results", "ndvi_results.sqlite")
+
+# Scenario name -> CSV written by the simulation stage
+# (ndvi_sim.c writes them to the working directory; Results/ holds the published copies)
+scenario_files = {
+    "constant": os.path.join("Results", "NDVI_scenario_constant.csv"),
+    "minus1percent": os.path.join("Results", "NDVI_scenario_minus1percent.csv"),
+    "plus1percent": os.path.join("Results", "NDVI_scenario_plus1percent.csv"),
+}
+
+# Clustered on (region, scenario, year): all rows of one region sit in
+# contiguous pages, so a per-region read never touches other regions.
+# The secondary index serves scenario-wide queries.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ndvi (
+    scenario    TEXT    NOT NULL,
+    region      TEXT    NOT NULL,
+    year        INTEGER NOT NULL,
+    b_predicted REAL,
+    PRIMARY KEY (region, scenario, year)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_ndvi_scenario ON ndvi (scenario, region, year);
+CREATE TABLE IF NOT EXISTS sources (
+    scenario TEXT PRIMARY KEY,
+    path     TEXT NOT NULL,
+    mtime    REAL NOT NULL
+);
+"""
+
+
+# -------------------------
+# STORE
+# -------------------------
+def open_store(path=store_path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def append_results(conn, scenario, df):
+    """
+    Append (or overwrite) simulated NDVI for one scenario.
+    df needs the Region, Year, B_predicted columns of the NDVI_scenario_*.csv files.
+    """
+    rows = zip(
+        [scenario] * len(df),
+        df["Region"].astype(str),
+        df["Year"].astype(int).tolist(),
+        df["B_predicted"].astype(float).tolist(),
+    )
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO ndvi (scenario, region, year, b_predicted) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+
+def import_csv(conn, scenario, path, chunksize=200_000):
+    """Load a simulator CSV output into the store chunk by chunk."""
+    n = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        append_results(conn, scenario, chunk)
+        n += len(chunk)
+    return n
+
+
+def source_csv(scenario, path):
+    """Newest of the Results/ file and the simulator's own output in the working directory."""
+    candidates = [p for p in (path, os.path.basename(path)) if os.path.exists(p)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def refresh_store(conn, files=scenario_files):
+    """
+    Re-import every scenario whose simulator CSV is newer than what the store holds
+    (rows of that scenario are replaced, not merged). Returns the refreshed scenarios.
+    """
+    refreshed = []
+    for scenario, path in files.items():
+        csv_path = source_csv(scenario, path)
+        if csv_path is None:
+            continue
+        mtime = os.path.getmtime(csv_path)
+        row = conn.execute("SELECT mtime FROM sources WHERE scenario = ?", (scenario,)).fetchone()
+        if row is not None and row[0] >= mtime:
+            continue
+        with conn:
+            conn.execute("DELETE FROM ndvi WHERE scenario = ?", (scenario,))
+        import_csv(conn, scenario, csv_path)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO sources (scenario, path, mtime) VALUES (?, ?, ?)",
+                         (scenario, csv_path, mtime))
+        refreshed.append(scenario)
+    return refreshed
+
+
+def open_fresh_store(path=store_path):
+    """open_store() after bringing it up to date with the simulator CSVs."""
+    conn = open_store(path)
+    refresh_store(conn)
+    return conn
+
+
+def read_region(conn, region, scenarios=None, start=None, end=None):
+    """NDVI of one region (all or selected scenarios), as a long DataFrame."""
+    sql = "SELECT scenario, region AS Region, year AS Year, b_predicted AS B_predicted FROM ndvi WHERE region = ?"
+    args = [region]
+    if scenarios is not None:
+        sql += f" AND scenario IN ({','.join('?' * len(scenarios))})"
+        args += list(scenarios)
+    if start is not None:
+        sql += " AND year >= ?"
+        args.append(int(start))
+    if end is not None:
+        sql += " AND year <= ?"
+        args.append(int(end))
+    sql += " ORDER BY scenario, year"
+    return pd.read_sql_query(sql, conn, params=args)
+
+
+def list_regions(conn):
+    return [r[0] for r in conn.execute("SELECT DISTINCT region FROM ndvi ORDER BY region")]
+
+
+def list_scenarios(conn):
+    return [r[0] for r in conn.execute("SELECT DISTINCT scenario FROM ndvi ORDER BY scenario")]
+
+
+if __name__ == "__main__":
+    conn = open_store()
+    refreshed = refresh_store(conn)
+    for scenario in scenario_files:
+        status = "imported" if scenario in refreshed else "up to date"
+        print(f"Scenario '{scenario}': {status}")
+    conn.close()
+    print(f"Result store: {store_path}")
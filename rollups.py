@@ -0,0 +1,144 @@
+import os
+import re
+import sys
+import glob
+import numpy as np
+import pandas as pd
+import rasterio
+import rasterio.mask
+
+from geometry_store import load_regions
+from checkpoint import atomic_write
+
+# -------------------------
+# SETTINGS
+# -------------------------
+data_folder = "data"
+stats_path = os.path.join("Results", "district_stats.csv")
+regional_path = "NDVI_pollution_regional.csv"   # input of regional_weights.py
+
+# <VARIABLE>_<YEAR>.tif, as in data.py (NDVI_2010.tif, NO2_2015.tif, ...)
+name_regex = re.compile(r"([^/\\]+)_(\d{4})\.tif$")
+
+KEYS = ["Region", "Canton", "Variable", "Year"]
+SOURCE = ["Path", "Mtime"]   # raster each (Variable, Year) was read from, and its mtime
+
+
+# -------------------------
+# SUFFICIENT STATISTICS (read rasters once)
+# -------------------------
+def district_stats(raster_path, variable, year):
+    """Pixel sum, pixel count and valid area of one raster inside every district."""
+    rows = []
+    with rasterio.open(raster_path) as src:
+        regions = load_regions(crs=src.crs)
+        pixel_area = abs(src.transform.a * src.transform.e)
+
+        for name, canton, geom in zip(regions["NAME"], regions["KANTONSNUM"], regions.geometry):
+            try:
+                masked, _ = rasterio.mask.mask(src, [geom], crop=True, filled=False)
+            except ValueError:
+                # Region does not overlap raster
+                continue
+            count = int(np.ma.count(masked))
+            total = float(masked.sum(dtype=np.float64)) if count else 0.0
+            rows.append({
+                "Region": name, "Canton": int(canton), "Variable": variable, "Year": year,
+                "Sum": total, "Count": count, "Area_m2": count * pixel_area,
+            })
+    return rows
+
+
+def build_stats(paths, out_path=stats_path):
+    """
+    Bring the stored table up to date with `paths`: a raster is read again when its
+    path or modification time differs from the one its rows were computed from.
+    """
+    stats = load_district_stats(out_path)
+    if stats is None:
+        stats = pd.DataFrame(columns=KEYS + ["Sum", "Count", "Area_m2"] + SOURCE)
+    for col in SOURCE:
+        if col not in stats:
+            stats[col] = np.nan   # table from before sources were recorded: re-read once
+    first = stats.drop_duplicates(["Variable", "Year"])
+    source = {(v, int(y)): (p, m) for v, y, p, m in first[["Variable", "Year"] + SOURCE].itertuples(index=False)}
+
+    stale, new_rows = set(), []
+    for path in paths:
+        m = name_regex.search(os.path.basename(path))
+        if not m:
+            print(f"Skipping (bad name): {path}")
+            continue
+        variable, year = m.group(1), int(m.group(2))
+        mtime = os.path.getmtime(path)
+        if source.get((variable, year)) == (path, mtime):
+            continue
+        print(f"Processing {variable} - {year}")
+        stale.add((variable, year))
+        new_rows.extend(dict(row, Path=path, Mtime=mtime) for row in district_stats(path, variable, year))
+
+    if stale:
+        keep = [key not in stale for key in zip(stats["Variable"], stats["Year"].astype(int))]
+        stats = pd.concat([stats[keep], pd.DataFrame(new_rows, columns=stats.columns)], ignore_index=True)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        atomic_write(out_path, lambda tmp: stats.to_csv(tmp, index=False))
+    return stats
+
+
+def load_district_stats(path=stats_path):
+    """Stored district statistics, or None if they were never built."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path)
+
+
+# -------------------------
+# ROLLUPS (no raster access)
+# -------------------------
+def add_level(stats, mapping, name):
+    """New aggregation level from a Region -> group mapping (Series or dict)."""
+    return stats.assign(**{name: stats["Region"].map(mapping)})
+
+
+def rollup(stats, level=None):
+    """
+    Aggregate to any level by summing the sufficient statistics:
+    Mean = sum(Sum) / sum(Count), i.e. the mean over all valid pixels of the
+    group, which weights each district by its valid area (equal-area grid).
+    level=None gives the national value, otherwise a column such as "Canton".
+    """
+    keys = ["Variable", "Year"] if level is None else [level, "Variable", "Year"]
+    agg = stats.groupby(keys, as_index=False)[["Sum", "Count", "Area_m2"]].sum()
+    agg["Mean"] = agg["Sum"] / agg["Count"].where(agg["Count"] > 0)
+    return agg
+
+
+def wide(agg, level=None):
+    """One column per variable, as in Switzerland_pollution_timeseries_COMPLETE.csv."""
+    index = ["Year"] if level is None else [level, "Year"]
+    return agg.pivot_table(index=index, columns="Variable", values="Mean").reset_index()
+
+
+def regional_table(stats):
+    """
+    Region x year table with one column per pollutant and Mean_NDVI,
+    the layout regional_weights.py fits on.
+    """
+    table = wide(rollup(stats, "Region"), "Region").rename(columns={"NDVI": "Mean_NDVI"})
+    table.columns.name = None
+    return table
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(data_folder, "*.tif")))
+    stats = build_stats(paths)
+
+    national = wide(rollup(stats))
+    cantons = wide(rollup(stats, "Canton"), "Canton")
+    national.to_csv(os.path.join("Results", "rollup_national.csv"), index=False)
+    cantons.to_csv(os.path.join("Results", "rollup_canton.csv"), index=False)
+    regional_table(stats).to_csv(regional_path, index=False)
+    print(f"saved {regional_path}")
+
+    print(f"{len(stats)} district statistics in {stats_path}")
+    print(national)
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from logistic_model import growth_rate, logistic_step, load_region_parameters
+from checkpoint import Checkpoint, run_units
+
+# -------------------------
+# SETTINGS
+# -------------------------
+params_path = "fitted_parameters.csv"
+out_path = os.path.join("Results", "sobol_indices.csv")
+
+END_YEAR = 2050
+N_BASE = 2**13            # N: the design has N * (d + 2) model runs per region
+REGION_CHUNK = 10         # regions per checkpointed unit
+SPREAD = 0.2              # r0, alpha, K, B0 uniform within +-20% of their fitted value
+RATE_RANGE = (-0.02, 0.02)  # annual change of the pollution trajectory
+BATCH = 2_000_000         # model runs evaluated together (bounds memory)
+
+PARAMETERS = ["r0", "alpha", "K", "B0", "rate"]
+
+
+# -------------------------
+# SAMPLING (Saltelli)
+# -------------------------
+def saltelli_design(n, d, seed=0):
+    """
+    Matrices A, B (n x d) from one scrambled Sobol sequence in [0, 1]^(2d)
+    and the d matrices AB_i (A with column i taken from B): n * (d + 2) rows in total.
+    """
+    base = qmc.Sobol(d=2 * d, scramble=True, seed=seed).random(n)
+    A, B = base[:, :d], base[:, d:]
+    AB = np.repeat(A[None], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    return np.concatenate([A, B, AB.reshape(-1, d)])
+
+
+def scale_samples(U, nominal):
+    """Map unit samples to parameter values around one region's fitted values."""
+    lo = 1.0 - SPREAD
+    width = 2.0 * SPREAD
+    X = np.empty_like(U)
+    for j, name in enumerate(PARAMETERS[:4]):
+        X[:, j] = nominal[name] * (lo + width * U[:, j])
+    X[:, 4] = RATE_RANGE[0] + (RATE_RANGE[1] - RATE_RANGE[0]) * U[:, 4]
+    # K/B0 must stay finite
+    X[:, 3] = np.clip(X[:, 3], 1e-6, None)
+    return X
+
+
+# -------------------------
+# MODEL (vectorized over samples)
+# -------------------------
+def ndvi_at_horizon(X, last_no2, n_years, steps_per_year=None):
+    """NDVI after n_years for every parameter row of X (r0, alpha, K, B0, rate)."""
+    r0, alpha, K, B, rate = X.T
+    growth = 1.0 + rate
+    P = np.full(len(X), float(last_no2))
+    for _ in range(n_years):
+        P = P * growth
+        B = logistic_step(B, K, growth_rate(r0, alpha, P), steps_per_year)
+    return B
+
+
+def evaluate(X, last_no2, n_years, steps_per_year=None):
+    out = np.empty(len(X))
+    for s in range(0, len(X), BATCH):
+        out[s:s + BATCH] = ndvi_at_horizon(X[s:s + BATCH], last_no2, n_years, steps_per_year)
+    return out
+
+
+# -------------------------
+# INDICES
+# -------------------------
+def sobol_indices(Y, n, d):
+    """
+    First-order (Saltelli 2010) and total (Jansen) indices from the
+    outputs of the A, B, AB_i blocks of saltelli_design().
+    """
+    fA, fB = Y[:n], Y[n:2 * n]
+    fAB = Y[2 * n:].reshape(d, n)
+    var = np.var(np.concatenate([fA, fB]))
+    if var == 0:
+        return np.zeros(d), np.zeros(d)
+    S1 = np.mean(fB * (fAB - fA), axis=1) / var
+    ST = 0.5 * np.mean((fA - fAB) ** 2, axis=1) / var
+    return S1, ST
+
+
+def region_sobol(region, p, U, n, n_years, steps_per_year):
+    nominal = {
+        "r0": p["r0_global"], "alpha": p["alpha_global"],
+        "K": p["K_estimated"], "B0": p["B0_estimated"],
+    }
+    X = scale_samples(U, nominal)
+    Y = evaluate(X, p["last_NO2"], n_years, steps_per_year)
+    S1, ST = sobol_indices(Y, n, len(PARAMETERS))
+    return [{"Region": region, "Parameter": name, "S1": s1, "ST": st}
+            for name, s1, st in zip(PARAMETERS, S1, ST)]
+
+
+def regional_sobol(params, n=N_BASE, end_year=END_YEAR, seed=0, steps_per_year=None,
+                   checkpoint=None, chunk=REGION_CHUNK):
+    """
+    Sobol indices of the END_YEAR NDVI of every region.
+    With a Checkpoint, regions are run by chunks and every finished chunk is
+    committed, so an interrupted run resumes at the first unfinished chunk.
+    """
+    d = len(PARAMETERS)
+    U = saltelli_design(n, d, seed)
+    first_year = int(params["last_year"].max()) + 1
+    n_years = end_year - first_year + 1
+
+    def run_chunk(block):
+        rows = []
+        for region, p in block.iterrows():
+            rows.extend(region_sobol(region, p, U, n, n_years, steps_per_year))
+        return pd.DataFrame(rows)
+
+    if checkpoint is None:
+        return run_chunk(params)
+
+    units = [(f"regions_{start}", (params.iloc[start:start + chunk],))
+             for start in range(0, len(params), chunk)]
+    return run_units(checkpoint, units, run_chunk)
+
+
+if __name__ == "__main__":
+    # Usage: python sensitivity.py [N] [--resume]
+    args = [a for a in sys.argv[1:] if a != "--resume"]
+    n = int(args[0]) if args else N_BASE
+    params = load_region_parameters(params_path)
+    # Seed and N are part of the job name: a resume never mixes two designs
+    checkpoint = Checkpoint(f"sobol_n{n}_seed0", resume="--resume" in sys.argv)
+
+    start = time.perf_counter()
+    indices = regional_sobol(params, n, checkpoint=checkpoint)
+    elapsed = time.perf_counter() - start
+    n_runs = n * (len(PARAMETERS) + 2) * len(params)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    indices.to_csv(out_path, index=False)
+    print(f"{n_runs} model runs in {elapsed:.1f} s")
+    print(indices.groupby("Parameter")[["S1", "ST"]].mean())
+    print(f"saved {out_path}")
@@ -0,0 +1,230 @@
+import os
+import re
+import sys
+import glob
+import time
+import calendar
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import rasterio
+
+from checkpoint import atomic_write
+
+# -------------------------
+# SETTINGS
+# -------------------------
+subannual_folder = os.path.join("data", "subannual")    # monthly / daily grids from the provider
+data_folder = "data"                                     # provider's annual <POLLUTANT>_<YEAR>.tif
+# Everything below is generated: the provider's files in data/ are never written
+annual_folder = os.path.join("data", "composites")       # <POLLUTANT>_<YEAR>.tif
+seasonal_folder = os.path.join(annual_folder, "seasonal")  # <POLLUTANT>_<YEAR>-<SEASON>.tif
+
+WORKERS = 4          # rasters decoded in parallel (GDAL releases the GIL while decoding)
+MIN_COVERAGE = 0.5   # share of the period's days a cell needs, otherwise nodata
+NODATA = -9999.0
+
+# NO2_2015.tif, NO2_2015-03.tif, NO2_201503.tif, NO2_2015_03_14.tif, NO2_2015-03-14.tif ...
+timestamp_regex = re.compile(r"([^/\\]+?)_(\d{4})(?:[-_]?(\d{2})(?:[-_]?(\d{2}))?)?\.tif$")
+
+# Meteorological seasons; December counts for the winter of the following year
+SEASONS = {12: "DJF", 1: "DJF", 2: "DJF", 3: "MAM", 4: "MAM", 5: "MAM",
+           6: "JJA", 7: "JJA", 8: "JJA", 9: "SON", 10: "SON", 11: "SON"}
+SEASON_MONTHS = {"DJF": (12, 1, 2), "MAM": (3, 4, 5), "JJA": (6, 7, 8), "SON": (9, 10, 11)}
+
+
+# -------------------------
+# FILE NAMES
+# -------------------------
+def parse_name(path):
+    """(pollutant, year, month, day) from a file name; month/day are None when absent."""
+    m = timestamp_regex.search(os.path.basename(path))
+    if not m:
+        return None
+    pollutant, year, month, day = m.groups()
+    return (pollutant.strip(), int(year),
+            int(month) if month else None, int(day) if day else None)
+
+
+def season_of(year, month):
+    return (year + 1 if month == 12 else year), SEASONS[month]
+
+
+def period_days(year, season=None):
+    if season is None:
+        return 366 if calendar.isleap(year) else 365
+    return sum(calendar.monthrange(year - 1 if m == 12 else year, m)[1] for m in SEASON_MONTHS[season])
+
+
+def plan(paths):
+    """
+    Sub-annual files with their weight (days covered) and the composites they feed:
+    the annual one of their calendar year and the seasonal one.
+    Monthly files are dropped for months that also have daily files, and a season
+    is only composited when all three of its months have files.
+    """
+    files = []
+    for path in paths:
+        parsed = parse_name(path)
+        if parsed is None or parsed[2] is None:
+            continue  # bad name, or already annual
+        files.append((path,) + parsed)
+
+    daily_months = {(p, y, m) for _, p, y, m, d in files if d is not None}
+
+    season_months = {}
+    for _, pollutant, year, month, _ in files:
+        season_months.setdefault((pollutant,) + season_of(year, month), set()).add(month)
+    complete = {key for key, months in season_months.items() if len(months) == 3}
+
+    out = []
+    for path, pollutant, year, month, day in files:
+        if day is None and (pollutant, year, month) in daily_months:
+            continue
+        weight = 1.0 if day is not None else float(calendar.monthrange(year, month)[1])
+        s_year, season = season_of(year, month)
+        targets = [(pollutant, year, None)]
+        if (pollutant, s_year, season) in complete:
+            targets.append((pollutant, s_year, season))
+        out.append(((year, month, day or 0, pollutant), path, weight, targets))
+
+    # Chronological order: a composite is complete shortly after its first file
+    out.sort()
+    return [(path, weight, targets) for _, path, weight, targets in out]
+
+
+# -------------------------
+# STREAMING ACCUMULATION
+# -------------------------
+class Accumulator:
+    """Running day-weighted sum and covered days per grid cell (float64, one pair per composite)."""
+
+    def __init__(self, profile):
+        self.profile = profile
+        shape = (profile["height"], profile["width"])
+        self.total = np.zeros(shape)
+        self.days = np.zeros(shape)
+
+    def add(self, arr, weight):
+        valid = ~np.ma.getmaskarray(arr)
+        self.total[valid] += weight * arr.data[valid]
+        self.days[valid] += weight
+
+    def result(self, needed_days, min_coverage=MIN_COVERAGE):
+        out = np.full(self.total.shape, np.nan)
+        ok = (self.days > 0) & (self.days >= min_coverage * needed_days)
+        out[ok] = self.total[ok] / self.days[ok]
+        return out
+
+
+def _decode(path):
+    with rasterio.open(path) as src:
+        return src.read(1, masked=True), src.profile
+
+
+def decoded(paths, workers=WORKERS):
+    """Decoded rasters in the order of `paths`, at most 2 * workers held in memory."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(_decode, path))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def composite_path(pollutant, year, season=None):
+    if season is None:
+        return os.path.join(annual_folder, f"{pollutant}_{year}.tif")
+    return os.path.join(seasonal_folder, f"{pollutant}_{year}-{season}.tif")
+
+
+def write_composite(path, data, profile):
+    profile = profile.copy()
+    profile.update(driver="GTiff", count=1, dtype="float32", nodata=NODATA, compress="deflate")
+
+    def write(tmp):
+        with rasterio.open(tmp, "w", **profile) as dst:
+            dst.write(np.where(np.isnan(data), NODATA, data).astype(np.float32), 1)
+
+    atomic_write(path, write)
+
+
+def aggregate(paths, workers=WORKERS, min_coverage=MIN_COVERAGE, force=False):
+    """
+    Annual and seasonal composites of sub-annual rasters, in one streaming pass.
+    Each composite is an accumulator that lives only until its last input file
+    has been added, then it is written and freed, so memory holds a few grids
+    whatever the number of files. Composites newer than all their inputs are skipped.
+    Returns the paths written.
+    """
+    work = plan(paths)
+
+    # Inputs of every composite, to know when it is complete or up to date
+    remaining = Counter(t for _, _, targets in work for t in targets)
+    newest = {}
+    for path, _, targets in work:
+        for t in targets:
+            newest[t] = max(newest.get(t, 0.0), os.path.getmtime(path))
+    skip = set() if force else {
+        t for t in remaining
+        if os.path.exists(composite_path(*t)) and os.path.getmtime(composite_path(*t)) >= newest[t]
+    }
+    work = [(p, w, targets) for p, w, targets in work if not all(t in skip for t in targets)]
+
+    open_acc = {}
+    written = []
+    for (path, weight, targets), (arr, profile) in zip(work, decoded([p for p, _, _ in work], workers)):
+        for t in targets:
+            if t in skip:
+                continue
+            acc = open_acc.get(t)
+            if acc is None:
+                acc = open_acc[t] = Accumulator(profile)
+            elif arr.shape != acc.total.shape or profile["transform"] != acc.profile["transform"]:
+                raise ValueError(f"{path} is not on the grid of the other {t[0]} files of {t[1]}")
+            acc.add(arr, weight)
+
+            remaining[t] -= 1
+            if remaining[t] == 0:
+                pollutant, year, season = t
+                acc = open_acc.pop(t)
+                out = composite_path(pollutant, year, season)
+                write_composite(out, acc.result(period_days(year, season), min_coverage), acc.profile)
+                written.append(out)
+    return written
+
+
+def annual_rasters(folder=data_folder):
+    """
+    Annual inputs of the pipeline: the provider's <POLLUTANT>_<YEAR>.tif in data/,
+    plus the composites of pollutant-years the provider did not deliver as annual files.
+    """
+    provided = sorted(glob.glob(os.path.join(folder, "*.tif")))
+    have = {parse_name(p)[:2] for p in provided if parse_name(p) and parse_name(p)[2] is None}
+    composites = [
+        p for p in sorted(glob.glob(os.path.join(annual_folder, "*.tif")))
+        if parse_name(p) and parse_name(p)[:2] not in have
+    ]
+    return provided + composites
+
+
+def ingest(folder=subannual_folder, workers=WORKERS):
+    """Bring the annual composites of data/composites/ up to date with the sub-annual files of `folder`."""
+    paths = sorted(glob.glob(os.path.join(folder, "**", "*.tif"), recursive=True))
+    if not paths:
+        return []
+    written = aggregate(paths, workers)
+    if written:
+        print(f"{len(written)} composites written from {len(paths)} sub-annual rasters")
+    return written
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else subannual_folder
+    start = time.perf_counter()
+    written = ingest(folder)
+    print(f"{len(written)} composites in {time.perf_counter() - start:.1f} s")
+    for path in written:
+        print(f"  {path}")
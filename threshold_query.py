@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from logistic_model import growth_rate, simulate_logistic, load_region_parameters, scenarios
+
+# -------------------------
+# SETTINGS
+# -------------------------
+params_path = "fitted_parameters.csv"
+out_path = os.path.join("Results", "threshold_crossings.csv")
+
+MAX_YEAR = 2100   # search horizon
+BLOCK = 16        # years computed together before checking who has crossed
+
+
+# -------------------------
+# FIRST PASSAGE
+# -------------------------
+# B moves monotonically from B0 towards K (r > 0 whatever the pollution), so a level T
+# is crossed iff it lies between B0 and K. With r constant over each year,
+#     B_n = K / (1 + (K/B0 - 1) * exp(-R_n)),   R_n = sum_i r(P_i)
+# and B_n has crossed T exactly when R_n >= R* = log((K/B0 - 1) / (K/T - 1)).
+
+def required_cumulated_rate(K, B0, T):
+    return np.log((K / B0 - 1.0) / (K / T - 1.0))
+
+
+def first_passage(params, threshold, direction="above", rates=scenarios, relative=False,
+                  max_year=MAX_YEAR, steps_per_year=None, block=BLOCK):
+    """
+    First year in which NDVI goes above (or below) `threshold`, for every region
+    and every scenario at once. relative=True reads the threshold as a fraction of K.
+
+    steps_per_year=None: exact yearly solution, the crossing is found on the
+    cumulated rate alone (no NDVI is simulated). Otherwise the Euler model of
+    ndvi_sim.c is simulated. Either way years are produced BLOCK at a time and
+    pairs that have crossed are dropped, so the search stops as soon as every
+    pair is settled instead of running to max_year.
+
+    Year is the first projected year past the threshold (as in the
+    Results/NDVI_scenario_*.csv files); Crossing the fractional time of the crossing.
+    """
+    if direction not in ("above", "below"):
+        raise ValueError("direction must be 'above' or 'below'")
+    sign = 1.0 if direction == "above" else -1.0
+
+    first_year = int(params["last_year"].max()) + 1
+    n_years = max_year - first_year + 1
+    names = list(rates)
+    n, S = len(params), len(names)
+
+    # One entry per (region, scenario) pair, region-major
+    def per_pair(col):
+        return np.repeat(params[col].to_numpy(dtype=float), S)
+
+    r0, alpha = per_pair("r0_global"), per_pair("alpha_global")
+    K, B0, P_last = per_pair("K_estimated"), per_pair("B0_estimated"), per_pair("last_NO2")
+    g = np.tile(np.array([rates[s] for s in names], dtype=float), n)
+    T = np.asarray(threshold, dtype=float) * (K if relative else 1.0)
+    T = np.broadcast_to(T, K.shape)
+
+    already = sign * (B0 - T) >= 0
+    reachable = sign * (K - T) > 0
+    year = np.full(n * S, -1, dtype=np.int64)
+    crossing = np.full(n * S, np.nan)
+
+    pending = np.flatnonzero(reachable & ~already)
+    if steps_per_year is None:
+        state = np.zeros(len(pending))                                # R so far
+        goal = required_cumulated_rate(K[pending], B0[pending], T[pending])
+    else:
+        state = B0[pending].copy()                                    # B so far
+
+    for start in range(0, n_years, block):
+        if pending.size == 0:
+            break
+        stop = min(start + block, n_years)
+        i = np.arange(start + 1, stop + 1)
+        P = P_last[pending, None] * (1.0 + g[pending, None]) ** i
+        r = growth_rate(r0[pending, None], alpha[pending, None], P)
+
+        if steps_per_year is None:
+            R = state[:, None] + np.cumsum(r, axis=1)
+            hit = R >= goal[:, None]
+            # Within the crossing year R grows linearly in time
+            frac = (goal[:, None] - (R - r)) / r
+            last = R[:, -1]
+        else:
+            B = simulate_logistic(state, K[pending], r, steps_per_year)
+            hit = sign * (B - T[pending, None]) >= 0
+            prev = np.concatenate([state[:, None], B[:, :-1]], axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                frac = (T[pending, None] - prev) / (B - prev)
+            last = B[:, -1]
+
+        found = hit.any(axis=1)
+        j = hit.argmax(axis=1)[found]
+        rows = np.arange(len(pending))[found]
+        year[pending[found]] = first_year + start + j
+        crossing[pending[found]] = first_year - 1 + start + j + np.clip(frac[rows, j], 0.0, 1.0)
+
+        pending, state = pending[~found], last[~found]
+        if steps_per_year is None:
+            goal = goal[~found]
+
+    condition = np.select(
+        [already, ~reachable, year >= 0],
+        ["already", "never", "crossed"],
+        default=f"not before {max_year}",
+    )
+    return pd.DataFrame({
+        "Region": np.repeat(params.index.to_numpy(), S),
+        "Scenario": np.tile(names, n),
+        "Threshold": T,
+        "Direction": direction,
+        "Year": pd.array(np.where(year >= 0, year, None), dtype="Int64"),
+        "Crossing": crossing,
+        "condition": condition,
+    })
+
+
+def parse_threshold(text):
+    """'0.6' -> (0.6, False); '0.95K' -> (0.95, True), i.e. 95% of each region's K."""
+    if text.upper().endswith("K"):
+        return float(text[:-1]), True
+    return float(text), False
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit("Usage: python threshold_query.py <threshold | fractionK> [above|below] [region ...]")
+    threshold, relative = parse_threshold(sys.argv[1])
+    direction = sys.argv[2] if len(sys.argv) > 2 else "above"
+    selected = sys.argv[3:]
+
+    params = load_region_parameters(params_path)
+    if selected:
+        params = params.loc[selected]
+
+    start = time.perf_counter()
+    table = first_passage(params, threshold, direction, relative=relative)
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    table.to_csv(out_path, index=False)
+    print(table.to_string(index=False) if selected else table["condition"].value_counts().to_string())
+    print(f"{len(table)} region/scenario pairs in {elapsed * 1000:.1f} ms, saved {out_path}")
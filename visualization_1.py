@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 
+from result_store import store_path, open_fresh_store, read_region
+
 # -------------------------------
 # DATA VISUALIZATION
 
@@ -10,18 +12,16 @@ import numpy as np
 region_of_interest = "Ouest lausannois"   
 
 # -------------------------------
-# Load the three scenario outputs
+# Load the three scenario outputs for the chosen region
+# (indexed read from the result store, refreshed from the CSVs when they are newer)
 # -------------------------------
-df_constant = pd.read_csv("NDVI_scenario_constant.csv")
-df_minus = pd.read_csv("NDVI_scenario_minus1percent.csv")
-df_plus  = pd.read_csv("NDVI_scenario_plus1percent.csv")
+conn = open_fresh_store(store_path)
+region_df = read_region(conn, region_of_interest)
+conn.close()
 
-# -------------------------------
-# Filter for the chosen region
-# -------------------------------
-constant_reg = df_constant[df_constant["Region"] == region_of_interest]
-minus_reg = df_minus[df_minus["Region"] == region_of_interest]
-plus_reg  = df_plus[df_plus["Region"] == region_of_interest]
+constant_reg = region_df[region_df["scenario"] == "constant"]
+minus_reg = region_df[region_df["scenario"] == "minus1percent"]
+plus_reg  = region_df[region_df["scenario"] == "plus1percent"]
 
 if constant_reg.empty or minus_reg.empty or plus_reg.empty:
     print(f"Region '{region_of_interest}' not found in scenario files.")